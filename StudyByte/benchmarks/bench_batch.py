@@ -0,0 +1,70 @@
+"""
+Batch Processing Benchmark
+Documents per second for a course folder processed one document at a time in
+the web process (as with one /api/process-pdf or /api/process-text request
+each) versus the shared batch pool at several worker counts
+
+Usage: python benchmarks/bench_batch.py [--pdfs 16] [--texts 16] [--pages 20] [--workers 1 2 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import BatchProcessor, analyze_document, hash_file
+from corpus import make_pdf, make_text
+
+
+def make_course(folder, pdfs, texts, pages):
+    documents = []
+    for i in range(pdfs):
+        path = os.path.join(folder, f"lecture_{i}.pdf")
+        make_pdf(path, pages, seed=i)
+        documents.append((os.path.basename(path), path, hash_file(path)))
+    for i in range(texts):
+        path = os.path.join(folder, f"notes_{i}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(make_text(pages * 250, seed=1000 + i))
+        documents.append((os.path.basename(path), path, hash_file(path)))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pdfs', type=int, default=16, help='PDF documents in the folder')
+    parser.add_argument('--texts', type=int, default=16, help='text documents in the folder')
+    parser.add_argument('--pages', type=int, default=20, help='pages per PDF (x250 words per text file)')
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, ai_config.batch_workers}))
+    args = parser.parse_args()
+
+    ai_config.pdf_workers = 1  # Per-document serial extraction, as in a batch worker
+    with tempfile.TemporaryDirectory() as folder:
+        documents = make_course(folder, args.pdfs, args.texts, args.pages)
+        print(f"{len(documents)} documents ({args.pdfs} PDFs x {args.pages} pages, {args.texts} texts)")
+        print(f"{'mode':<24}{'seconds':>10}{'docs/s':>10}")
+
+        analyze_document(documents[0][1], use_cache=False)  # Load TextBlob/NLTK
+        start = time.perf_counter()
+        for _, path, content_hash in documents:
+            analyze_document(path, content_hash, use_cache=False)
+        elapsed = time.perf_counter() - start
+        print(f"{'one at a time':<24}{elapsed:>10.2f}{len(documents) / elapsed:>10.1f}")
+
+        for workers in args.workers:
+            processor = BatchProcessor(workers)
+            list(processor.run(documents[:workers], use_cache=False))  # Start and warm the workers
+            start = time.perf_counter()
+            events = list(processor.run(documents, use_cache=False))
+            elapsed = time.perf_counter() - start
+            failed = events[-1]['failed']
+            note = f"  ({failed} failed)" if failed else ''
+            print(f"{f'batch, {workers} workers':<24}{elapsed:>10.2f}{len(documents) / elapsed:>10.1f}{note}")
+            processor.get_pool().shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Chat Latency Benchmark
+Compares sequential, concurrent and combined chat modes against a stubbed Gemini model
+
+Usage: python benchmarks/bench_chat.py [--latency 0.3] [--messages 20]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import mental_health_bot
+from stub_model import StubGeminiModel, install
+
+
+def run(mode, model, messages):
+    ai_config.chat_mode = mode
+    ai_config.response_cache.clear()
+    model.reset()
+    start = time.perf_counter()
+    for message in messages:
+        mental_health_bot.process_message(message)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(messages), model.calls / len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.3, help='stub latency per call (seconds)')
+    parser.add_argument('--messages', type=int, default=20, help='messages per mode')
+    args = parser.parse_args()
+
+    model = StubGeminiModel(args.latency)
+    install(model)
+    ai_config.sentiment_prefilter_confidence = 0  # Every message needs Gemini
+    messages = [f"I'm stressed about exam number {i}" for i in range(args.messages)]
+
+    print(f"Stub latency: {args.latency * 1000:.0f} ms per call, {args.messages} messages per mode")
+    print(f"{'mode':<12}{'latency/msg':>14}{'calls/msg':>12}")
+    for mode in ['sequential', 'concurrent', 'combined']:
+        latency, calls = run(mode, model, messages)
+        print(f"{mode:<12}{latency * 1000:>11.1f} ms{calls:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
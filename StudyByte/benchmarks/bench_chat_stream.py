@@ -0,0 +1,72 @@
+"""
+Chat Streaming Benchmark
+Time to first byte and total time for /api/chat versus the SSE /api/chat/stream,
+served over real HTTP with a stubbed streaming Gemini model
+
+Usage: python benchmarks/bench_chat_stream.py [--latency 0.3] [--token-latency 0.05] [--requests 10]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import http.client
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+
+from config import ai_config
+from stub_model import StubGeminiModel, install
+from student_companion_clean import create_app
+
+
+def measure(port, path, message):
+    """Seconds until the first body byte and until the response is complete"""
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    start = time.perf_counter()
+    connection.request('POST', path, body=json.dumps({'message': message}),
+                       headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    response.read(1)
+    first_byte = time.perf_counter() - start
+    response.read()
+    total = time.perf_counter() - start
+    connection.close()
+    return first_byte, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.3, help='stub time to first token (seconds)')
+    parser.add_argument('--token-latency', type=float, default=0.05, help='stub generation time per word (seconds)')
+    parser.add_argument('--requests', type=int, default=10, help='requests per endpoint')
+    args = parser.parse_args()
+
+    install(StubGeminiModel(args.latency, token_latency=args.token_latency))
+    ai_config.response_cache.ttls = {}  # Every request reaches the stub
+    ai_config.chat_mode = 'concurrent'  # Same two calls the stream makes
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, create_app(warm=False), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"Stub: {args.latency * 1000:.0f} ms to first token, {args.token_latency * 1000:.0f} ms per word, "
+          f"{args.requests} requests per endpoint")
+    print(f"{'endpoint':<20}{'TTFB p50':>12}{'TTFB max':>12}{'total p50':>12}")
+    for path in ['/api/chat', '/api/chat/stream']:
+        results = [measure(server.port, path, f"I'm stressed about exam number {i}")
+                   for i in range(args.requests)]
+        first_bytes = [first for first, _ in results]
+        totals = [total for _, total in results]
+        print(f"{path:<20}{statistics.median(first_bytes) * 1000:>9.0f} ms{max(first_bytes) * 1000:>9.0f} ms"
+              f"{statistics.median(totals) * 1000:>9.0f} ms")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
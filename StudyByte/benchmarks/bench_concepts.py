@@ -0,0 +1,111 @@
+"""
+Key Concept Counting Benchmark
+Accuracy of Space-Saving top-k counting against exact counts on large Zipf phrase
+streams, and peak memory of key-concept extraction on a textbook-sized text:
+whole-text analysis vs sentence windows with exact or approximate counting
+
+Usage: python benchmarks/bench_concepts.py [--occurrences 2000000] [--distinct 500000]
+                                           [--capacities 256 1024 2048 8192] [--words 500000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import SpaceSaving, TextAnalysis, pdf_processor
+from corpus import make_notes
+
+
+def key_concepts(counter):
+    """The key concept rule used by the analysis code"""
+    return [phrase for phrase, count in counter.most_common(15) if count > 1][:10]
+
+
+def whole_text_concepts(text):
+    """Key concepts counted exactly over one analysis of the whole text"""
+    analysis = TextAnalysis(text)
+    counts = Counter()
+    for index in range(len(analysis.sentences)):
+        counts.update(analysis.phrases_in(index))
+    return key_concepts(counts)
+
+
+def phrase_stream(occurrences, distinct, skew, seed=0):
+    rng = random.Random(seed)
+    phrases = [f"concept {i}" for i in range(distinct)]
+    rng.shuffle(phrases)  # Popularity unrelated to first appearance
+    weights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(distinct)))
+    return rng.choices(phrases, cum_weights=weights, k=occurrences)
+
+
+def traced(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def accuracy(stream, capacities):
+    exact, exact_seconds, exact_peak = traced(lambda: Counter(stream))
+    truth = key_concepts(exact)
+    top = [phrase for phrase, _ in exact.most_common(15)]
+    print(f"{'counter':<16}{'memory MB':>11}{'s':>7}{'same key concepts':>19}{'top-15 recall':>15}{'max error':>11}")
+    print(f"{'exact':<16}{exact_peak / 2 ** 20:>11.1f}{exact_seconds:>7.2f}{'-':>19}{'-':>15}{'-':>11}")
+    for capacity in capacities:
+        def build():
+            counter = SpaceSaving(capacity)
+            counter.update(stream)
+            return counter
+        sketch, seconds, peak = traced(build)
+        found = [phrase for phrase, _ in sketch.most_common(15)]
+        recall = len(set(found) & set(top)) / len(top)
+        max_error = max((sketch.counts.get(phrase, 0) - exact[phrase]) / exact[phrase] for phrase in top)
+        same = 'yes' if key_concepts(sketch) == truth else 'no'
+        print(f"{f'space-saving {capacity}':<16}{peak / 2 ** 20:>11.1f}{seconds:>7.2f}{same:>19}"
+              f"{recall:>15.0%}{max_error:>11.2%}")
+
+
+def extraction_memory(words):
+    notes = make_notes(max(1, words // 100), seed=1)
+    text = ' '.join(' '.join([note['summary']] + note['key_points']) for note in notes)
+    print(f"\nKey concepts of a {len(text.split()):,}-word text")
+    print(f"{'mode':<30}{'peak MB':>9}{'s':>7}")
+
+    baseline, seconds, peak = traced(lambda: whole_text_concepts(text))
+    print(f"{'whole text, exact':<30}{peak / 2 ** 20:>9.1f}{seconds:>7.2f}")
+    for mode in ('exact', 'approximate'):
+        ai_config.concept_counting = mode
+        result, seconds, peak = traced(lambda: pdf_processor.process_text_directly(text))
+        note = '' if result['key_concepts'] == baseline else '  (key concepts differ)'
+        print(f"{f'windows, {mode}':<30}{peak / 2 ** 20:>9.1f}{seconds:>7.2f}{note}")
+    print(f"(the {len(text) / 2 ** 20:.1f} MB input string is allocated before tracing starts)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--occurrences', type=int, default=2000000, help='phrase occurrences per stream')
+    parser.add_argument('--distinct', type=int, default=500000, help='distinct phrases')
+    parser.add_argument('--skews', type=float, nargs='+', default=[1.0, 0.8], help='Zipf exponents')
+    parser.add_argument('--capacities', type=int, nargs='+', default=[256, 1024, 2048, 8192])
+    parser.add_argument('--words', type=int, default=500000, help='words in the extraction test')
+    args = parser.parse_args()
+
+    for skew in args.skews:
+        print(f"{args.occurrences:,} occurrences of {args.distinct:,} phrases, Zipf exponent {skew}")
+        accuracy(phrase_stream(args.occurrences, args.distinct, skew), args.capacities)
+        print()
+    extraction_memory(args.words)
+
+
+if __name__ == '__main__':
+    main()
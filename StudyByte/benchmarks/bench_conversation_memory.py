@@ -0,0 +1,73 @@
+"""
+Conversation Memory Benchmark
+Memory used per 10k active chat sessions and prompt size over a long conversation,
+bounded memory versus resending the full history
+
+Usage: python benchmarks/bench_conversation_memory.py [--sessions 10000] [--turns 6] [--conversation 50]
+"""
+import os
+import sys
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import ConversationStore, mental_health_bot
+
+MESSAGE = "I have {n} assignments due this week and I keep putting them off. I don't know where to start."
+REPLY = ("That sounds like a lot to carry at once. Try picking the smallest assignment and giving it "
+         "25 focused minutes; finishing one thing often makes the rest feel more manageable.")
+
+
+def measure_memory(sessions, turns):
+    store = ConversationStore(max_turns=ai_config.chat_history_turns, max_sessions=sessions,
+                              max_bytes=2 ** 40, ttl=10 ** 9)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for s in range(sessions):
+        session_id = f"session-{s:08d}"
+        for n in range(turns):
+            store.add_turn(session_id, MESSAGE.format(n=n), REPLY)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, store.stats()['size_bytes']
+
+
+def prompt_growth(length):
+    store = mental_health_bot.conversations
+    rows = []
+    history = []
+    for n in range(1, length + 1):
+        message = MESSAGE.format(n=n)
+        bounded = mental_health_bot.build_chat_prompt(message, store.context('growth'))
+        full = mental_health_bot.build_chat_prompt(message, '\n'.join(history))
+        instruction = mental_health_bot.chat_prompts.instruction_tokens  # Sent with every call as well
+        rows.append((n, instruction + ai_config.estimate_tokens(bounded), instruction + ai_config.estimate_tokens(full)))
+        store.add_turn('growth', message, REPLY)
+        history.append(f"Student: {message}\nYou: {REPLY}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sessions', type=int, default=10000, help='active sessions')
+    parser.add_argument('--turns', type=int, default=6, help='turns per session')
+    parser.add_argument('--conversation', type=int, default=50, help='turns in the long conversation')
+    args = parser.parse_args()
+
+    used, estimated = measure_memory(args.sessions, args.turns)
+    print(f"{args.sessions} sessions x {args.turns} turns (history {ai_config.chat_history_turns} turns)")
+    print(f"  traced memory:    {used / 2 ** 20:7.1f} MB ({used / args.sessions:,.0f} bytes/session)")
+    print(f"  store estimate:   {estimated / 2 ** 20:7.1f} MB (used for the CHAT_MEMORY_MAX_MB cap)")
+
+    print(f"\nPrompt tokens over a {args.conversation}-turn conversation "
+          f"(context budget {ai_config.chat_context_tokens} tokens)")
+    print(f"{'turn':>6}{'bounded':>10}{'full history':>14}")
+    for n, bounded, full in prompt_growth(args.conversation):
+        if n in (1, 2, 5, 10, 20) or n % 25 == 0:
+            print(f"{n:>6}{bounded:>10}{full:>14}")
+
+
+if __name__ == '__main__':
+    main()
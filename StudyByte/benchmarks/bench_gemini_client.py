@@ -0,0 +1,74 @@
+"""
+Gemini Client Resilience Benchmark
+Drives the GeminiClient with a flaky stub model to show retry success rate,
+circuit breaker behaviour and the latency histograms
+
+Usage: python benchmarks/bench_gemini_client.py [--latency 0.05] [--failure-rate 0.3] [--requests 100] [--concurrency 8]
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import GeminiClient, CircuitOpenError
+from stub_model import StubGeminiModel
+
+
+def run(client, model, requests, concurrency):
+    outcomes = {'ok': 0, 'failed': 0, 'circuit_open': 0}
+
+    def call(i):
+        try:
+            client.generate(model, f"message {i}", feature='chat')
+            return 'ok'
+        except CircuitOpenError:
+            return 'circuit_open'
+        except Exception:
+            return 'failed'
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for outcome in pool.map(call, range(requests)):
+            outcomes[outcome] += 1
+    return outcomes, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.05, help='stub latency per call (seconds)')
+    parser.add_argument('--failure-rate', type=float, default=0.3, help='fraction of calls failing with 503')
+    parser.add_argument('--requests', type=int, default=100, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent callers')
+    args = parser.parse_args()
+
+    scenarios = [
+        ('no retries', StubGeminiModel(args.latency, failure_rate=args.failure_rate, seed=1),
+         GeminiClient(max_retries=0, breaker_threshold=10 ** 6)),
+        ('2 retries', StubGeminiModel(args.latency, failure_rate=args.failure_rate, seed=1),
+         GeminiClient(max_retries=2, backoff_base=0.05, backoff_max=0.2, breaker_threshold=10 ** 6)),
+        ('outage', StubGeminiModel(args.latency, failure_rate=1.0, seed=1),
+         GeminiClient(max_retries=2, backoff_base=0.05, backoff_max=0.2, breaker_threshold=5)),
+    ]
+
+    print(f"Stub latency: {args.latency * 1000:.0f} ms, failure rate {args.failure_rate:.0%}, "
+          f"{args.requests} requests x {args.concurrency} callers")
+    print(f"{'scenario':<12}{'ok':>6}{'failed':>8}{'open':>6}{'upstream calls':>16}{'wall':>10}")
+    for name, model, client in scenarios:
+        outcomes, elapsed = run(client, model, args.requests, args.concurrency)
+        print(f"{name:<12}{outcomes['ok']:>6}{outcomes['failed']:>8}{outcomes['circuit_open']:>6}"
+              f"{model.calls:>16}{elapsed:>9.2f}s")
+
+    histogram = scenarios[1][2].stats()['histograms']['upstream_latency']['chat']
+    print(f"\nUpstream latency histogram (2 retries): {histogram['count']} observations")
+    previous = 0
+    for bound, count in histogram['buckets'].items():
+        if count != previous:
+            print(f"  <= {bound:>5}s  {count - previous}")
+        previous = count
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Hedged Requests Benchmark
+/api/chat and /api/summarize latency percentiles and the share of Gemini-powered
+answers on a "slow day" (heavy-tailed stub latency), waiting for Gemini versus
+racing it against the local engine under an SLO, then the same requests again
+once the late Gemini replies have been cached
+
+Usage: python benchmarks/bench_hedging.py [--requests 200] [--median 0.3] [--sigma 1.0]
+                                          [--chat-slo-ms 800] [--summarize-slo-ms 1500]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import create_app, hedger
+from stub_model import StubGeminiModel, install
+from corpus import make_messages, make_text
+from timing import percentile
+
+
+class SlowDayModel(StubGeminiModel):
+    """Stub whose latency is log-normal around median: most calls are fine, a few are very slow"""
+    def __init__(self, median, sigma, seed=0):
+        super().__init__(median)
+        self.sigma = sigma
+        self._latency_random = random.Random(seed)
+
+    def _wait(self, usage):
+        with self._lock:
+            delay = self.latency * self._latency_random.lognormvariate(0, self.sigma)
+        time.sleep(delay)
+
+
+def run(client, path, bodies):
+    latencies, powered = [], 0
+    for body in bodies:
+        start = time.perf_counter()
+        response = client.post(path, json=body)
+        latencies.append(time.perf_counter() - start)
+        powered += response.get_json()['ai_powered']
+    latencies.sort()
+    return (percentile(latencies, 0.5), percentile(latencies, 0.99), latencies[-1], powered / len(bodies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='requests per route and mode')
+    parser.add_argument('--median', type=float, default=0.3, help='median stub latency (seconds)')
+    parser.add_argument('--sigma', type=float, default=1.0, help='log-normal shape; larger = heavier tail')
+    parser.add_argument('--chat-slo-ms', type=float, default=800)
+    parser.add_argument('--summarize-slo-ms', type=float, default=1500)
+    args = parser.parse_args()
+
+    install(SlowDayModel(args.median, args.sigma))
+    ai_config.chat_mode = 'combined'
+    client = create_app(warm=False).test_client()
+    messages = make_messages(args.requests)
+    texts = [make_text(400, seed=i) for i in range(args.requests)]
+    routes = [('/api/chat', 'chat', [{'message': message} for message in messages], args.chat_slo_ms),
+              ('/api/summarize', 'summarize', [{'text': text} for text in texts], args.summarize_slo_ms)]
+
+    print(f"Stub latency log-normal, median {args.median * 1000:.0f} ms, sigma {args.sigma}; "
+          f"{args.requests} requests per row")
+    print(f"{'route':<16}{'mode':<22}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'ai_powered':>12}")
+    for path, route, bodies, slo_ms in routes:
+        modes = [('wait for Gemini', 0), (f'hedged, SLO {slo_ms:.0f} ms', slo_ms), ('hedged, repeated', slo_ms)]
+        for name, slo in modes:
+            if name != 'hedged, repeated':
+                ai_config.response_cache.clear()
+            else:
+                hedger.executor.shutdown(wait=True)  # Let the late replies land in the cache
+                hedger.executor = type(hedger.executor)(max_workers=ai_config.hedge_workers,
+                                                        thread_name_prefix='hedge')
+            ai_config.hedge_slo_ms[route] = slo
+            p50, p99, worst, powered = run(client, path, bodies)
+            print(f"{path:<16}{name:<22}{p50 * 1000:>9.0f}{p99 * 1000:>9.0f}{worst * 1000:>9.0f}{powered:>12.0%}")
+
+
+if __name__ == '__main__':
+    main()
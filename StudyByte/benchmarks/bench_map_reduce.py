@@ -0,0 +1,62 @@
+"""
+Map-Reduce Summarization Benchmark
+Single-prompt vs chunked summarization of a long document against a stub model,
+plus re-summarizing after a one-sentence edit to show per-chunk cache reuse
+
+Usage: python benchmarks/bench_map_reduce.py [--words 20000] [--per-token-latency 0.0002]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import text_summarizer
+from stub_model import StubGeminiModel, install
+from corpus import make_text
+
+
+def timed_summary(model, text):
+    model.reset()
+    start = time.perf_counter()
+    result = text_summarizer.summarize_text(text)
+    assert result['ai_powered'], "stub model call failed"
+    return time.perf_counter() - start, model.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0.2, help='fixed stub latency per call (seconds)')
+    parser.add_argument('--per-token-latency', type=float, default=0.0002, help='stub latency per prompt token')
+    args = parser.parse_args()
+
+    model = StubGeminiModel(args.latency, args.per_token_latency)
+    install(model)
+    text = make_text(args.words)
+    chunk_tokens, budget = text_summarizer.chunk_tokens, text_summarizer.summary_prompts.budget
+
+    print(f"Document: {args.words} words (~{ai_config.estimate_tokens(text)} tokens), "
+          f"chunks of {chunk_tokens} tokens, concurrency {ai_config.summary_concurrency}")
+
+    ai_config.response_cache.clear()
+    text_summarizer.chunk_tokens = 10 ** 9
+    text_summarizer.summary_prompts.budget = 0  # Send the whole document untrimmed
+    elapsed, calls = timed_summary(model, text)
+    print(f"single prompt:        {elapsed:7.2f}s  {calls:3d} calls")
+
+    ai_config.response_cache.clear()
+    text_summarizer.chunk_tokens, text_summarizer.summary_prompts.budget = chunk_tokens, budget
+    elapsed, calls = timed_summary(model, text)
+    print(f"map-reduce:           {elapsed:7.2f}s  {calls:3d} calls")
+
+    middle = len(text) // 2
+    edited = text[:middle] + " Students should review this definition before the exam. " + text[middle:]
+    elapsed, calls = timed_summary(model, edited)
+    print(f"map-reduce after edit:{elapsed:7.2f}s  {calls:3d} calls")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+PDF Extraction Benchmark
+Compares serial and process-pool page extraction on generated PDFs
+
+Usage: python benchmarks/bench_pdf_extraction.py [--pages 10 100 1000] [--workers 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import pdf_processor
+from corpus import make_pdf
+
+
+def timed_extract(pdf_path, parallel):
+    ai_config.pdf_parallel_min_pages = 1 if parallel else float('inf')
+    start = time.perf_counter()
+    text = pdf_processor.extract_text_from_pdf(pdf_path)
+    return time.perf_counter() - start, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--workers', type=int, default=ai_config.pdf_workers)
+    args = parser.parse_args()
+
+    ai_config.pdf_workers = args.workers
+    print(f"Workers: {args.workers}")
+    print(f"{'pages':>6}{'serial':>12}{'parallel':>12}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = os.path.join(tmp, f"bench_{pages}.pdf")
+            make_pdf(pdf_path, pages)
+            timed_extract(pdf_path, parallel=True)  # Warm up the pool
+            serial_time, serial_text = timed_extract(pdf_path, parallel=False)
+            parallel_time, parallel_text = timed_extract(pdf_path, parallel=True)
+            assert serial_text == parallel_text, "parallel output differs from serial"
+            print(f"{pages:>6}{serial_time:>11.3f}s{parallel_time:>11.3f}s{serial_time / parallel_time:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
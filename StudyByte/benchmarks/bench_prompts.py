@@ -0,0 +1,83 @@
+"""
+Prompt Budget Benchmark
+Input tokens and stub latency per Gemini call for normal messages and oversized
+pastes, with and without the per-feature input token budgets, and the token
+counts recorded per feature
+
+Usage: python benchmarks/bench_prompts.py [--paste-words 20000] [--per-token-latency 0.0002]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import mental_health_bot, text_summarizer
+from stub_model import StubGeminiModel, install
+from corpus import make_text
+
+MESSAGE = "I have three exams next week and I can't focus on any of them."
+
+
+def calls(paste):
+    chat = mental_health_bot.chat_prompts
+    sentiment = mental_health_bot.sentiment_prompts
+    summary = text_summarizer.summary_prompts
+    return [
+        ('chat', chat, lambda: chat.generate(mental_health_bot.build_chat_prompt(paste),
+                                             ai_config.get_generation_config())),
+        ('sentiment', sentiment, lambda: sentiment.generate(
+            sentiment.build(mental_health_bot.SENTIMENT_TEMPLATE, 'message', message=paste),
+            {'temperature': 0.1, 'max_output_tokens': 10})),
+        ('summary', summary, lambda: summary.generate(
+            summary.build(text_summarizer.SUMMARY_TEMPLATE, 'text', text=paste),
+            ai_config.get_generation_config())),
+    ]
+
+
+def measure(paste, budgets):
+    rows = []
+    for feature, prompts, call in calls(paste):
+        prompts.budget = budgets[feature]
+        ai_config.response_cache.clear()
+        before = ai_config.gemini_client.stats()['histograms'].get('input_tokens', {}).get(feature, {'sum': 0})
+        start = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - start
+        after = ai_config.gemini_client.stats()['histograms']['input_tokens'][feature]
+        rows.append((feature, after['sum'] - before['sum'], elapsed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--paste-words', type=int, default=20000, help='size of the oversized paste')
+    parser.add_argument('--latency', type=float, default=0.05, help='fixed stub latency per call (seconds)')
+    parser.add_argument('--per-token-latency', type=float, default=0.0002, help='stub latency per input token')
+    args = parser.parse_args()
+
+    install(StubGeminiModel(args.latency, args.per_token_latency))
+    budgets = dict(ai_config.prompt_token_budgets)
+    unlimited = dict.fromkeys(budgets, 0)
+    paste = make_text(args.paste_words)
+
+    print(f"Budgets (input tokens): {budgets}; stub {args.latency * 1000:.0f} ms + "
+          f"{args.per_token_latency * 1e6:.0f} us/token")
+    print(f"{'input':<20}{'feature':<11}{'no budget':>16}{'budget':>16}{'latency':>22}")
+    for name, text in [('short message', MESSAGE), (f'{args.paste_words}-word paste', paste)]:
+        for (feature, raw, raw_s), (_, fitted, fitted_s) in zip(measure(text, unlimited), measure(text, budgets)):
+            print(f"{name:<20}{feature:<11}{raw:>9,.0f} tokens{fitted:>9,.0f} tokens"
+                  f"{raw_s * 1000:>10.0f} -> {fitted_s * 1000:>5.0f} ms")
+
+    print("\nRecorded per feature (all calls above):")
+    histograms = ai_config.gemini_client.stats()['histograms']
+    for feature, snapshot in sorted(histograms['input_tokens'].items()):
+        output = histograms['output_tokens'][feature]
+        print(f"  {feature:<11}{snapshot['count']:>3} requests{snapshot['sum']:>10,.0f} input tokens"
+              f"{output['sum']:>6,.0f} output tokens")
+
+
+if __name__ == '__main__':
+    main()
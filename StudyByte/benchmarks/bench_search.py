@@ -0,0 +1,80 @@
+"""
+Search Index Benchmark
+Indexing throughput, on-disk size and query latency percentiles for /api/search
+(BM25) and concept co-occurrence lookups on a large synthetic index
+
+Usage: python benchmarks/bench_search.py [--documents 100000] [--queries 200] [--db PATH]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex
+from corpus import make_notes
+from timing import percentile
+
+
+def percentiles(func, args_list):
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+    return [percentile(latencies, fraction) * 1000 for fraction in (0.50, 0.95, 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=100000, help='documents to index')
+    parser.add_argument('--queries', type=int, default=200, help='queries per query class')
+    parser.add_argument('--db', help='index file to build (default: a temporary file)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, 'search_index.db')
+        index = SearchIndex(db_path)
+        notes = make_notes(args.documents)
+
+        # Rerunning with the same --db skips documents that are already indexed
+        start = time.perf_counter()
+        added = sum(index.add(f"{i:064x}", 'pdf', f"Lecture {i}", note) for i, note in enumerate(notes))
+        elapsed = time.perf_counter() - start
+        stats = index.stats()
+        text_bytes = sum(len(' '.join([n['summary']] + n['key_points'] + n['key_concepts'])) for n in notes)
+        if added:
+            print(f"Indexed {added} documents in {elapsed:.1f}s ({added / elapsed:,.0f} docs/s)")
+        print(f"Database {stats['size_bytes'] / 2 ** 20:.1f} MB for {text_bytes / 2 ** 20:.1f} MB of notes text "
+              f"({stats['size_bytes'] / stats['documents']:,.0f} bytes/document), {stats['concepts']} concepts")
+
+        # Query terms by document frequency, from the corpus itself
+        frequency = Counter(word for note in notes for word in set(
+            ' '.join([note['summary']] + note['key_points']).lower().replace('.', '').split()))
+        ranked = [word for word, _ in frequency.most_common()]
+        concept_frequency = Counter(concept.lower() for note in notes for concept in note['key_concepts'])
+        concepts = [concept for concept, _ in concept_frequency.most_common()]
+        rng = random.Random(0)
+        classes = [
+            ('search, common word', index.search, [(rng.choice(ranked[:20]),) for _ in range(args.queries)]),
+            ('search, mid-frequency', index.search, [(rng.choice(ranked[200:2000]),) for _ in range(args.queries)]),
+            ('search, rare word', index.search, [(rng.choice(ranked[-5000:]),) for _ in range(args.queries)]),
+            ('search, two words', index.search,
+             [(f"{rng.choice(ranked[:500])} {rng.choice(ranked[:2000])}",) for _ in range(args.queries)]),
+            ('related, common concept', index.related_concepts,
+             [(rng.choice(concepts[:20]),) for _ in range(args.queries)]),
+            ('related, rare concept', index.related_concepts,
+             [(rng.choice(concepts[-1000:]),) for _ in range(args.queries)]),
+        ]
+        print(f"\n{'query':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for name, func, args_list in classes:
+            p50, p95, p99 = percentiles(func, args_list)
+            print(f"{name:<26}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
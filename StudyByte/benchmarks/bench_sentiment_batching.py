@@ -0,0 +1,76 @@
+"""
+Sentiment Batching Benchmark
+Gemini calls per second and sentiment latency with and without micro-batching,
+under simulated concurrent chat load against a stubbed Gemini model
+
+Usage: python benchmarks/bench_sentiment_batching.py [--latency 0.3] [--clients 32] [--messages 5] [--window-ms 20] [--batch-size 16]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import mental_health_bot
+from stub_model import StubGeminiModel, install
+
+
+def run(model, clients, messages, max_batch, window_seconds):
+    batcher = mental_health_bot.sentiment_batcher
+    batcher.max_batch = max_batch
+    batcher.window_seconds = window_seconds
+    ai_config.response_cache.clear()
+    model.reset()
+
+    def client(c):
+        latencies = []
+        for m in range(messages):
+            start = time.perf_counter()
+            mental_health_bot.get_sentiment_from_gemini(f"Client {c} is worried about deadline {m}")
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = [latency for result in pool.map(client, range(clients)) for latency in result]
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'calls_per_s': model.calls / elapsed,
+        'calls_per_msg': model.calls / len(latencies),
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+        'msgs_per_s': len(latencies) / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.3, help='stub latency per call (seconds)')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent chat clients')
+    parser.add_argument('--messages', type=int, default=5, help='messages per client')
+    parser.add_argument('--window-ms', type=float, default=20, help='batch window (ms)')
+    parser.add_argument('--batch-size', type=int, default=16, help='maximum batch size')
+    args = parser.parse_args()
+
+    model = StubGeminiModel(args.latency)
+    install(model)
+    ai_config.gemini_client.max_retries = 0
+    ai_config.sentiment_prefilter_confidence = 2.0  # Every message needs Gemini
+
+    print(f"Stub latency: {args.latency * 1000:.0f} ms per call, {args.clients} clients x {args.messages} messages")
+    print(f"{'mode':<24}{'calls/s':>10}{'calls/msg':>11}{'msgs/s':>9}{'p50':>10}{'p95':>10}")
+    for name, max_batch in [('one call per message', 1),
+                            (f'batched ({args.window_ms:.0f} ms / {args.batch_size})', args.batch_size)]:
+        result = run(model, args.clients, args.messages, max_batch, args.window_ms / 1000)
+        print(f"{name:<24}{result['calls_per_s']:>10.1f}{result['calls_per_msg']:>11.2f}{result['msgs_per_s']:>9.1f}"
+              f"{result['p50'] * 1000:>7.0f} ms{result['p95'] * 1000:>7.0f} ms")
+    print(f"Batcher: {mental_health_bot.sentiment_batcher.stats()}")
+
+
+if __name__ == '__main__':
+    main()
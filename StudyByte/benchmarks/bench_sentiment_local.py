@@ -0,0 +1,64 @@
+"""
+Local Sentiment Benchmark
+Messages per second for the TextBlob path versus the local hashed n-gram model
+(one call per message and predict_batch), plus how many Gemini sentiment calls
+the confidence pre-filter would skip
+
+Usage: python benchmarks/bench_sentiment_local.py [--messages 5000] [--batch-size 256] [--threshold 0.85]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentiment_model import SentimentModel, load_seed, DEFAULT_SEED_PATH
+from student_companion_clean import mental_health_bot
+
+
+def throughput(func, messages):
+    start = time.perf_counter()
+    func(messages)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=5000, help='messages to classify')
+    parser.add_argument('--batch-size', type=int, default=256, help='predict_batch size')
+    parser.add_argument('--threshold', type=float, default=0.85, help='pre-filter confidence threshold')
+    args = parser.parse_args()
+
+    _, texts = load_seed(DEFAULT_SEED_PATH)
+    # Vary the messages so nothing is served from a cache
+    messages = [f"{texts[i % len(texts)]} ({i})" for i in range(args.messages)]
+    model = SentimentModel.load()
+
+    def textblob(batch):
+        for message in batch:
+            mental_health_bot.analyze_sentiment_textblob(message)
+
+    def single(batch):
+        for message in batch:
+            model.predict(message)
+
+    def batched(batch):
+        for start in range(0, len(batch), args.batch_size):
+            model.predict_batch(batch[start:start + args.batch_size])
+
+    mental_health_bot.analyze_sentiment_textblob("warm up")
+    print(f"{args.messages} messages")
+    print(f"{'path':<28}{'msgs/s':>12}")
+    for name, func in [('TextBlob + keyword scan', textblob),
+                       ('local model, per message', single),
+                       (f'local model, batch of {args.batch_size}', batched)]:
+        print(f"{name:<28}{throughput(func, messages):>12,.0f}")
+
+    _, confidences = model.predict_batch(messages)
+    skipped = sum(confidence >= args.threshold for confidence in confidences)
+    print(f"\nPre-filter at {args.threshold}: {skipped / len(messages):.0%} of Gemini sentiment calls skipped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Serving Load Test
+Throughput and latency percentiles of the Flask dev server vs gunicorn
+(gunicorn.conf.py) against a stubbed Gemini model
+
+Usage: python benchmarks/bench_serving.py [--requests 400] [--concurrency 32] [--latency 0.2] [--profile io]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from timing import percentile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+
+
+def post_json(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def wait_until_up(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"{base_url}/api/health", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+def load_test(mode, port, args):
+    env = dict(os.environ, ANALYSIS_CACHE_DB='', STUB_LATENCY=str(args.latency), SERVER_PROFILE=args.profile)
+    server = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, 'stub_server.py'), mode, str(port)],
+                              cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_up(base_url)
+        url = f"{base_url}/api/chat"
+        payloads = [{'message': f"I'm stressed about exam {i}"} for i in range(args.requests)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(pool.map(lambda payload: post_json(url, payload), payloads))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50': statistics.median(latencies),
+        'p99': percentile(latencies, 0.99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.2, help='stub Gemini latency (seconds)')
+    parser.add_argument('--profile', default='io', help='SERVER_PROFILE for gunicorn (chat is I/O-bound)')
+    args = parser.parse_args()
+
+    print(f"{args.requests} /api/chat requests, concurrency {args.concurrency}, stub latency {args.latency}s, "
+          f"gunicorn profile '{args.profile}'")
+    print(f"{'server':<10}{'req/s':>9}{'p50':>10}{'p99':>10}")
+    for mode, port in [('dev', 5101), ('gunicorn', 5102)]:
+        result = load_test(mode, port, args)
+        print(f"{mode:<10}{result['throughput']:>9.1f}{result['p50'] * 1000:>8.0f}ms{result['p99'] * 1000:>8.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
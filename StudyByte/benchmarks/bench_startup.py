@@ -0,0 +1,48 @@
+"""
+Startup Benchmark
+Import time and peak RSS of a fresh worker process with lazy imports
+(the default) and with warm_up(), which loads everything the old eager
+startup did
+
+Usage: python benchmarks/bench_startup.py [--runs 5]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import student_companion_clean as app_module
+app = app_module.create_app(warm=%s)
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def measure(warm):
+    output = subprocess.run([sys.executable, '-c', PROBE % warm], cwd=APP_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'startup':<10}{'median time':>13}{'peak RSS':>12}")
+    for label, warm in [('lazy', False), ('warm', True)]:
+        samples = [measure(warm) for _ in range(args.runs)]
+        seconds = statistics.median(sample['seconds'] for sample in samples)
+        rss = statistics.median(sample['max_rss_mb'] for sample in samples)
+        print(f"{label:<10}{seconds * 1000:>10.0f} ms{rss:>9.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
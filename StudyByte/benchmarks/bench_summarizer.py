@@ -0,0 +1,75 @@
+"""
+Extractive Summarizer Benchmark
+Original dict/any() ranking vs the vectorized ExtractiveSummarizer
+
+Usage: python benchmarks/bench_summarizer.py [--words 1000 10000 50000]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textblob import TextBlob
+from student_companion_clean import text_summarizer
+from corpus import SENTENCES, make_text
+
+
+def original_fallback_summarize(text, max_sentences=3):
+    """The original fallback_summarize, kept as the baseline"""
+    text = re.sub(r'\s+', ' ', text).strip()
+    blob = TextBlob(text)
+    sentences = [str(sentence).strip() for sentence in blob.sentences if len(str(sentence)) > 10]
+    if len(sentences) <= max_sentences:
+        return ' '.join(sentences)
+    words = [word.lower() for word in blob.words if len(word) > 2]
+    word_freq = Counter(words)
+    sentence_scores = {}
+    for sentence in sentences:
+        words_in_sentence = sentence.lower().split()
+        score = sum(word_freq.get(word, 0) for word in words_in_sentence)
+        sentence_scores[sentence] = score / len(words_in_sentence) if words_in_sentence else 0
+    top_sentences = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:max_sentences]
+    summary_sentences = [sentence for sentence in sentences if any(sentence == s[0] for s in top_sentences)]
+    return ' '.join(summary_sentences)
+
+
+def unique_text(word_count):
+    """Mostly distinct sentences, so the original engine cannot collapse them"""
+    sentences = []
+    words = 0
+    index = 0
+    while words < word_count:
+        sentence = SENTENCES[index % len(SENTENCES)].rstrip('.') + f" in lesson {index}."
+        sentences.append(sentence)
+        words += len(sentence.split())
+        index += 1
+    return ' '.join(sentences)
+
+
+def timed(func, text):
+    start = time.perf_counter()
+    result = func(text)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    # On the repeated corpus the original returns every copy of a top
+    # sentence, so only the distinct corpus is expected to match
+    print(f"{'words':>7}  {'corpus':<9}{'original':>10}{'vectorized':>12}{'speedup':>10}  same summary")
+    for words in args.words:
+        for corpus, text in [('repeated', make_text(words)), ('distinct', unique_text(words))]:
+            before, expected = timed(original_fallback_summarize, text)
+            after, actual = timed(text_summarizer.fallback_summarize, text)
+            print(f"{words:>7}  {corpus:<9}{before:>9.3f}s{after:>11.3f}s{before / after:>9.1f}x  {expected == actual}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Text Analysis Benchmark
+CPU time per document for the original multi-pass TextBlob code vs TextAnalysis
+
+Usage: python benchmarks/bench_text_analysis.py [--words 1000 10000] [--repeat 3]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textblob import TextBlob
+from student_companion_clean import pdf_processor
+from corpus import make_text
+
+
+def multi_pass_process_text(text):
+    """The original process_text_directly analysis, kept as the baseline"""
+    clean_text = re.sub(r'\s+', ' ', text).strip()
+    blob = TextBlob(clean_text)
+    sentences = [str(s) for s in blob.sentences if 20 < len(str(s)) < 200]
+    noun_phrases = [phrase.title() for phrase in blob.noun_phrases
+                    if 3 < len(phrase) < 50 and not phrase.isdigit()]
+    key_concepts = [phrase for phrase, count in Counter(noun_phrases).most_common(15) if count > 1]
+    summary = ' '.join([str(s) for s in blob.sentences[:3]])[:400]
+    return {'summary': summary, 'key_concepts': key_concepts[:10], 'key_points': sentences[:5]}
+
+
+def cpu_time(func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        func(text)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'words':>7}{'multi-pass':>13}{'single-pass':>13}{'reduction':>11}")
+    for words in args.words:
+        text = make_text(words)
+        before = cpu_time(multi_pass_process_text, text, args.repeat)
+        after = cpu_time(pdf_processor.process_text_directly, text, args.repeat)
+        print(f"{words:>7}{before:>12.3f}s{after:>12.3f}s{(1 - after / before) * 100:>10.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Transcription Throughput Benchmark
+Real-time factor (processing time / audio duration) of the local Whisper
+pipeline for different worker counts
+
+Requires ffmpeg and openai-whisper. Without --file, a synthetic tone track is
+generated, which measures throughput but produces no meaningful transcript.
+
+Usage: python benchmarks/bench_transcription.py [--file lecture.mp3] [--workers 1 2 4]
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from transcription import SAMPLE_RATE, Transcriber
+
+
+def make_wav(path, seconds):
+    """Tone bursts separated by short gaps, so there are silences to split at"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.25 * t) > -0.9)
+    with wave.open(path, 'wb') as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(SAMPLE_RATE)
+        output.writeframes((signal * 32767).astype(np.int16).tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--file', help='audio/video file to transcribe')
+    parser.add_argument('--seconds', type=int, default=120, help='length of the synthetic track')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--model', default=ai_config.whisper_model)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        media_path = args.file
+        if not media_path:
+            media_path = os.path.join(tmp, 'synthetic.wav')
+            make_wav(media_path, args.seconds)
+
+        print(f"Model: {args.model}, window: {ai_config.transcribe_window_seconds}s")
+        print(f"{'workers':>8}{'audio':>10}{'elapsed':>10}{'RTF':>8}{'windows':>9}")
+        for workers in args.workers:
+            transcriber = Transcriber(args.model, workers, ai_config.transcribe_window_seconds)
+            # Occupy every worker once so model loading is not timed
+            list(transcriber.get_pool().map(time.sleep, [1] * workers))
+            start = time.perf_counter()
+            result = transcriber.transcribe(media_path)
+            elapsed = time.perf_counter() - start
+            duration = result['duration_seconds']
+            print(f"{workers:>8}{duration:>9.1f}s{elapsed:>9.1f}s{elapsed / duration:>8.2f}{result['windows']:>9}")
+            transcriber.get_pool().shutdown()
+
+
+if __name__ == '__main__':
+    main()
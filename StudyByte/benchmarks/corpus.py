@@ -0,0 +1,114 @@
+"""
+Synthetic Benchmark Corpora
+Deterministic study texts, generated PDFs and audio for the benchmark scripts
+"""
+import wave
+import random
+import itertools
+
+SENTENCES = [
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The mitochondria releases energy from glucose through cellular respiration.",
+    "Newton's second law states that force equals mass times acceleration.",
+    "Supply and demand determine the equilibrium price in a competitive market.",
+    "The French Revolution transformed political power structures across Europe.",
+    "Binary search finds an element in a sorted array in logarithmic time.",
+    "Enzymes lower the activation energy required for chemical reactions.",
+    "The Pythagorean theorem relates the sides of a right triangle.",
+    "Operant conditioning shapes behavior through reinforcement and punishment.",
+    "Plate tectonics explains earthquakes, volcanoes and mountain formation.",
+    "Hash tables provide constant time lookup on average for key value pairs.",
+    "The cell membrane controls which substances enter and leave the cell.",
+]
+
+MESSAGE_OPENERS = ["I'm stressed about", "I feel great about", "Can you help me plan", "I'm worried about",
+                   "I just finished", "I keep procrastinating on", "I'm excited for", "What should I do about"]
+MESSAGE_TOPICS = ["my chemistry exam", "the history essay", "tomorrow's presentation", "my group project",
+                  "finals week", "the calculus problem set", "my internship interview", "my reading list"]
+
+def make_messages(count, seed=0):
+    """Short chat messages like students send to the companion"""
+    rng = random.Random(seed)
+    return [f"{rng.choice(MESSAGE_OPENERS)} {rng.choice(MESSAGE_TOPICS)}" for _ in range(count)]
+
+def make_text(word_count, seed=0):
+    """Lecture-like text of roughly word_count words"""
+    rng = random.Random(seed)
+    words = 0
+    sentences = []
+    while words < word_count:
+        sentence = rng.choice(SENTENCES)
+        sentences.append(sentence)
+        words += len(sentence.split())
+    return ' '.join(sentences)
+
+def make_pdf(path, pages, words_per_page=250, seed=0):
+    """Write a minimal text PDF with the given number of pages"""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for _ in range(pages):
+        lines = []
+        words = 0
+        while words < words_per_page:
+            sentence = rng.choice(SENTENCES)
+            lines.append(sentence.replace('(', '').replace(')', '').replace('\\', ''))
+            words += len(sentence.split())
+        content = "BT /F1 9 Tf 40 760 Td 11 TL " + ' '.join(f"({line}) '" for line in lines) + " ET"
+        stream = content.encode('latin-1')
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    with open(path, 'wb') as file:
+        file.write(output)
+
+def make_wav(path, seconds, rate=16000):
+    """Write a silent mono 16-bit WAV recording of the given length"""
+    with wave.open(path, 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(b'\x00\x00' * int(seconds * rate))
+
+SYLLABLES = ['ba', 'ce', 'di', 'fo', 'gu', 'ha', 'ki', 'lo', 'ma', 'ne', 'pi', 'ro', 'sa', 'te', 'vi', 'zo']
+
+def make_notes(count, vocabulary=20000, concepts=5000, seed=0):
+    """Analysis results (summary, key points, key concepts) with Zipf-distributed
+    words and concepts, so some terms are in most documents and most are rare"""
+    rng = random.Random(seed)
+    words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) + str(i % 10)
+             for i in range(vocabulary)]
+    word_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+    phrases = [f"{rng.choice(words).title()} {rng.choice(words).title()}" for _ in range(concepts)]
+    phrase_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(concepts)))
+
+    def sentence(length):
+        return ' '.join(rng.choices(words, cum_weights=word_weights, k=length)).capitalize() + '.'
+
+    notes = []
+    for _ in range(count):
+        key_points = [sentence(rng.randint(8, 16)) for _ in range(5)]
+        notes.append({
+            'summary': ' '.join(sentence(rng.randint(10, 20)) for _ in range(3)),
+            'key_points': key_points,
+            'key_concepts': list(dict.fromkeys(rng.choices(phrases, cum_weights=phrase_weights, k=10)))
+        })
+    return notes
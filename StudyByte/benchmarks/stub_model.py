@@ -0,0 +1,115 @@
+"""
+Stub Gemini Model
+Offline stand-in for GenerativeModel with configurable latency and call counting
+"""
+import re
+import json
+import time
+import random
+import threading
+
+
+class StubUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class StubResponse:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class StubAPIError(Exception):
+    """Mimics a transient API error carrying an HTTP status code"""
+    def __init__(self, code=503):
+        super().__init__(f"stub upstream error {code}")
+        self.code = code
+
+
+class StubGeminiModel:
+    """Latency is latency + per_token_latency * (prompt and system instruction characters / 4)
+
+    token_latency adds generation time per output word: a plain call returns
+    after all of it, a stream=True call yields each word as it is "generated".
+    With failure_rate > 0 that fraction of calls raises a 503 StubAPIError
+    after the latency has elapsed.
+    """
+    def __init__(self, latency=0.3, per_token_latency=0.0, failure_rate=0.0, seed=None, token_latency=0.0):
+        self.latency = latency
+        self.per_token_latency = per_token_latency
+        self.failure_rate = failure_rate
+        self.token_latency = token_latency
+        self._random = random.Random(seed)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+
+    def create_model(self, model_name, system_instruction=None, **kwargs):
+        """Stands in for genai.GenerativeModel(...); calls on the new model still count here"""
+        return StubInstructedModel(self, system_instruction)
+
+    def reply(self, prompt, generation_config=None):
+        config = generation_config or {}
+        if config.get('response_mime_type') == 'application/json' and '"sentiments"' in prompt:
+            count = len(re.findall(r'^\d+\. ', prompt, re.MULTILINE))
+            return json.dumps({'sentiments': ['negative'] * count})
+        if config.get('response_mime_type') == 'application/json':
+            return json.dumps({'reply': "That sounds tough. Let's take it one step at a time.",
+                               'sentiment': 'negative'})
+        if config.get('max_output_tokens') == 10:
+            return 'negative'
+        if 'summar' in prompt.lower():
+            return "This section covers the key concepts of the lecture and how they connect."
+        return "That sounds tough. Let's take it one step at a time."
+
+    def generate_content(self, prompt, generation_config=None, stream=False, system_instruction=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        text = self.reply(prompt, generation_config)
+        words = text.split(' ')
+        usage = StubUsage(len(prompt + (system_instruction or '')) // 4 + 1, len(words))
+        if stream:
+            return self._stream(usage, words)
+        self._wait(usage)
+        time.sleep(self.token_latency * len(words))
+        return StubResponse(text, usage)
+
+    def _wait(self, usage):
+        time.sleep(self.latency + self.per_token_latency * usage.prompt_token_count)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise StubAPIError(503)
+
+    def _stream(self, usage, words):
+        self._wait(usage)
+        for i, word in enumerate(words):
+            time.sleep(self.token_latency)
+            last = i == len(words) - 1
+            yield StubResponse(word if last else word + ' ', usage if last else None)
+
+
+def install(stub):
+    """Serve every Gemini model the app uses from stub
+
+    Models created with a system instruction go through the same
+    genai.GenerativeModel(model_name, system_instruction=...) call as in
+    production, which is pointed at the stub.
+    """
+    import google.generativeai as genai
+    from config import ai_config
+    genai.GenerativeModel = stub.create_model
+    ai_config.gemini_model = stub
+    return stub
+
+
+class StubInstructedModel:
+    def __init__(self, stub, system_instruction):
+        self.stub = stub
+        self.system_instruction = system_instruction
+
+    def generate_content(self, prompt, **kwargs):
+        return self.stub.generate_content(prompt, system_instruction=self.system_instruction, **kwargs)
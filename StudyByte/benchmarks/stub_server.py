@@ -0,0 +1,32 @@
+"""
+StudyByte Server with a Stubbed Gemini Model
+Used by bench_serving.py; no API key or network access needed
+
+Usage: STUB_LATENCY=0.2 python benchmarks/stub_server.py dev|gunicorn PORT
+"""
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+from config import ai_config
+from stub_model import StubGeminiModel, install
+from student_companion_clean import create_app
+
+install(StubGeminiModel(float(os.getenv('STUB_LATENCY', '0.2'))))
+ai_config.response_cache.ttls = {}  # Every request reaches the stub
+
+# Loaded by gunicorn as stub_server:app
+app = create_app()
+
+
+if __name__ == '__main__':
+    mode, port = sys.argv[1], sys.argv[2]
+    if mode == 'dev':
+        app.run(host='127.0.0.1', port=int(port), threaded=True)
+    else:
+        os.chdir(APP_DIR)
+        os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                   '--bind', f'127.0.0.1:{port}', '--pythonpath', BENCH_DIR, 'stub_server:app'])
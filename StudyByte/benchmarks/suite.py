@@ -0,0 +1,286 @@
+"""
+Benchmark Suite
+Throughput, latency percentiles and peak memory for the core functions and every
+/api route (uploads, batches, jobs, search and metrics included), on deterministic corpora with a stubbed Gemini model. Results can be
+saved as a JSON baseline and later runs fail when they regress past a threshold.
+
+Usage: python benchmarks/suite.py [--only REGEX] [--list] [--latency 0.05] [--seconds 2]
+                                  [--save baseline.json] [--compare baseline.json --threshold 0.2]
+                                  [--profile DIR [--profiler cprofile|pyinstrument]]
+"""
+import io
+import itertools
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ai_config
+from student_companion_clean import create_app, mental_health_bot, text_summarizer, pdf_processor
+from corpus import make_messages, make_pdf, make_text, make_wav
+from stub_model import StubGeminiModel, install
+from timing import percentile
+
+
+class Scenario:
+    """A named benchmark; run(i) performs the i-th operation"""
+    def __init__(self, name, kind, run, min_runs=3):
+        self.name = name
+        self.kind = kind
+        self.run = run
+        self.min_runs = min_runs
+
+
+def build_scenarios(args, workdir):
+    messages = make_messages(256)
+    texts = {words: make_text(words, seed=words) for words in args.sizes}
+    pdfs = {}
+    for pages in args.pages:
+        pdfs[pages] = os.path.join(workdir, f"bench_{pages}_pages.pdf")
+        make_pdf(pdfs[pages], pages, seed=pages)
+    audio = os.path.join(workdir, 'bench_lecture.wav')
+    make_wav(audio, seconds=5)
+
+    client = create_app(warm=False).test_client()
+
+    # Searches need something to find: index the text corpora up front
+    concepts = []
+    for words, text in texts.items():
+        notes = pdf_processor.process_text_directly(text)
+        pdf_processor.index_result('text', f"bench-{words}", f"Benchmark text {words}w", notes)
+        concepts += notes.get('key_concepts') or []
+    concept = concepts[0] if concepts else 'energy'
+
+    def check(path, response, status=200):
+        response.get_data()  # Drain streamed bodies too
+        if response.status_code != status:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+        return response
+
+    def post_json(path, body):
+        check(path, client.post(path, json=body))
+
+    def post_file(path, field, file_path, status=200):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        name = os.path.basename(file_path)
+        def run(i):
+            check(path, client.post(path, data={field: (io.BytesIO(data), name)},
+                                    content_type='multipart/form-data'), status)
+        return run
+
+    def post_pdf(path, pdf_path):
+        return post_file(path, 'pdf_file', pdf_path)
+
+    def post_batch(text_list):
+        def run(i):
+            files = [(io.BytesIO(text.encode()), f"notes_{n}.txt") for n, text in enumerate(text_list)]
+            response = check('/api/process-batch', client.post('/api/process-batch?cache=0', data={'files': files},
+                                                               content_type='multipart/form-data'))
+            if b'"event": "error"' in response.get_data():
+                raise RuntimeError("/api/process-batch reported a failed document")
+        return run
+
+    def run_job(pdf_path):
+        with open(pdf_path, 'rb') as f:
+            data = f.read()
+        uploads = itertools.count()
+        def run(i):
+            # A distinct trailer per upload, so the queue does real work rather than deduplicating
+            body = data + b"%% upload %d\n" % next(uploads)
+            job = check('/api/process-pdf', client.post('/api/process-pdf?async=1&cache=0',
+                                                        data={'pdf_file': (io.BytesIO(body), 'notes.pdf')},
+                                                        content_type='multipart/form-data'), 202).get_json()
+            check('/api/jobs/stream', client.get(f"{job['status_url']}/stream"))
+            status = check('/api/jobs', client.get(job['status_url'])).get_json()['status']
+            if status != 'done':
+                raise RuntimeError(f"job {job['job_id']} finished as {status}")
+        return run
+
+    scenarios = [
+        Scenario('fn/analyze_sentiment_textblob/short', 'function',
+                 lambda i: mental_health_bot.analyze_sentiment_textblob(messages[i % len(messages)])),
+        Scenario('fn/analyze_sentiment_local/short', 'function',
+                 lambda i: mental_health_bot.analyze_sentiment_local(messages[i % len(messages)])),
+    ]
+    for words, text in texts.items():
+        scenarios += [
+            Scenario(f'fn/fallback_summarize/{words}w', 'function',
+                     lambda i, text=text: text_summarizer.fallback_summarize(text)),
+            Scenario(f'fn/process_text_directly/{words}w', 'function',
+                     lambda i, text=text: pdf_processor.process_text_directly(text)),
+        ]
+    for pages, path in pdfs.items():
+        scenarios.append(Scenario(f'fn/extract_notes/{pages}p', 'function',
+                                  lambda i, path=path: pdf_processor.extract_notes(path)))
+
+    scenarios += [
+        Scenario('route/chat', 'route',
+                 lambda i: post_json('/api/chat', {'message': messages[i % len(messages)]})),
+        Scenario('route/chat_stream', 'route',
+                 lambda i: post_json('/api/chat/stream', {'message': messages[i % len(messages)]})),
+        Scenario('route/health', 'route', lambda i: client.get('/api/health').get_data()),
+        Scenario('route/metrics', 'route', lambda i: check('/api/metrics', client.get('/api/metrics'))),
+        Scenario('route/search', 'route',
+                 lambda i: check('/api/search', client.get('/api/search', query_string={'q': 'energy glucose'}))),
+        Scenario('route/search_related', 'route',
+                 lambda i: check('/api/search/related',
+                                 client.get('/api/search/related', query_string={'concept': concept}))),
+        Scenario('route/process_video/5s_wav', 'route', post_file('/api/process-video', 'video_file', audio)),
+    ]
+    for words, text in texts.items():
+        scenarios += [
+            Scenario(f'route/summarize/{words}w', 'route',
+                     lambda i, text=text: post_json('/api/summarize', {'text': text})),
+            Scenario(f'route/process_text/{words}w', 'route',
+                     lambda i, text=text: post_json('/api/process-text?cache=0', {'text': text})),
+        ]
+    for pages, path in pdfs.items():
+        scenarios += [
+            Scenario(f'route/process_pdf/{pages}p', 'route', post_pdf('/api/process-pdf?cache=0', path)),
+            Scenario(f'route/process_pdf_stream/{pages}p', 'route',
+                     post_pdf('/api/process-pdf/stream?cache=0', path)),
+            Scenario(f'route/jobs/{pages}p', 'route', run_job(path)),
+        ]
+    scenarios.append(Scenario(f'route/process_batch/{len(texts)}docs', 'route', post_batch(list(texts.values()))))
+    return scenarios
+
+
+def measure(scenario, seconds):
+    scenario.run(0)  # Warm up caches, lazy imports and pools
+
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < scenario.min_runs or time.perf_counter() - started < seconds:
+        start = time.perf_counter()
+        scenario.run(len(latencies) + 1)
+        latencies.append(time.perf_counter() - start)
+    total = time.perf_counter() - started
+
+    # Separate run for memory, so tracing does not skew the timings
+    tracemalloc.start()
+    scenario.run(0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'runs': len(latencies),
+        'ops_per_s': round(len(latencies) / total, 3),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'peak_mb': round(peak / 2 ** 20, 2)
+    }
+
+
+def profile(scenario, directory, profiler, runs=5):
+    """Write a cProfile .prof (view with snakeviz) or a pyinstrument HTML flame graph"""
+    filename = re.sub(r'[^\w.-]+', '_', scenario.name)
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+        session = Profiler()
+        session.start()
+        for i in range(runs):
+            scenario.run(i)
+        session.stop()
+        path = os.path.join(directory, f"{filename}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(session.output_html())
+    else:
+        import cProfile
+        session = cProfile.Profile()
+        session.enable()
+        for i in range(runs):
+            scenario.run(i)
+        session.disable()
+        path = os.path.join(directory, f"{filename}.prof")
+        session.dump_stats(path)
+    return path
+
+
+def compare(results, baseline, threshold):
+    """Scenarios whose p50 grew by more than threshold against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before and result['p50_ms'] > before['p50_ms'] * (1 + threshold):
+            regressions.append((name, before['p50_ms'], result['p50_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', help='run scenarios whose name matches this regex')
+    parser.add_argument('--list', action='store_true', help='list scenario names and exit')
+    parser.add_argument('--latency', type=float, default=0.05, help='stub Gemini latency per call (seconds)')
+    parser.add_argument('--seconds', type=float, default=2.0, help='minimum time per scenario')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='text sizes (words)')
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 50, 200], help='PDF sizes (pages)')
+    parser.add_argument('--save', help='write results to this JSON baseline')
+    parser.add_argument('--compare', help='fail if slower than this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed p50 regression (0.2 = 20%%)')
+    parser.add_argument('--profile', metavar='DIR', help='also write a profile per scenario to DIR')
+    parser.add_argument('--profiler', choices=['cprofile', 'pyinstrument'], default='cprofile')
+    args = parser.parse_args()
+
+    install(StubGeminiModel(args.latency))
+    ai_config.response_cache.ttls = {}  # Every request reaches the stub
+
+    with tempfile.TemporaryDirectory() as workdir:
+        scenarios = build_scenarios(args, workdir)
+        if args.only:
+            scenarios = [scenario for scenario in scenarios if re.search(args.only, scenario.name)]
+        if args.list:
+            print('\n'.join(scenario.name for scenario in scenarios))
+            return 0
+        if args.profile:
+            os.makedirs(args.profile, exist_ok=True)
+
+        print(f"Stub latency {args.latency * 1000:.0f} ms, at least {args.seconds:g} s per scenario")
+        print(f"{'scenario':<38}{'runs':>6}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>9}")
+        results = {}
+        for scenario in scenarios:
+            try:
+                result = measure(scenario, args.seconds)
+            except Exception as e:
+                print(f"{scenario.name:<38} failed: {e}")
+                continue
+            results[scenario.name] = result
+            print(f"{scenario.name:<38}{result['runs']:>6}{result['ops_per_s']:>10.1f}{result['p50_ms']:>10.1f}"
+                  f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['peak_mb']:>9.1f}")
+            if args.profile:
+                profile(scenario, args.profile, args.profiler)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'meta': {'python': platform.python_version(), 'machine': platform.machine(),
+                         'cpus': os.cpu_count(), 'stub_latency': args.latency,
+                         'created': time.strftime('%Y-%m-%dT%H:%M:%S')},
+                'results': results
+            }, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%} (p50):")
+            for name, before, after in regressions:
+                print(f"  {name:<38}{before:>10.1f} ms -> {after:.1f} ms")
+            return 1
+        print(f"\nNo p50 regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
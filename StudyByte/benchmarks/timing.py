@@ -0,0 +1,12 @@
+"""
+Timing Helpers
+Latency percentiles shared by the benchmarks
+"""
+import math
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values (in any order); fraction 0.99 = p99"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
@@ -3,29 +3,732 @@ AI Configuration for Student Companion
 Handles Gemini API integration and settings
 """
 import os
+import json
+import time
+import random
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import google.generativeai as genai
 
 # Load environment variables
 load_dotenv()
 
+class ResponseCache:
+    """Content-addressed cache for Gemini responses
+    
+    Keeps a bounded in-memory LRU tier and an optional SQLite tier that
+    survives restarts. Entries expire after a per-feature TTL. Expired rows
+    are purged every PURGE_EVERY writes, which also drops the rows closest
+    to expiry beyond max_db_entries, so the SQLite tier stays bounded
+    (to max_db_entries + PURGE_EVERY) even though almost every chat
+    prompt is unique.
+    """
+    PURGE_EVERY = 256
+    
+    def __init__(self, max_entries=1024, db_path=None, ttls=None, max_db_entries=100000):
+        self.max_entries = max_entries
+        self.max_db_entries = max_db_entries
+        self.ttls = ttls or {}
+        self._writes = 0
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {}
+        
+        self.db_path = db_path
+        self._db = None
+        if db_path:
+            self._connect()
+            self._purge()
+            self._db.commit()
+        
+        # Forked workers (e.g. gunicorn --preload) must not share a connection
+        os.register_at_fork(after_in_child=self._after_fork)
+    
+    def _connect(self):
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, feature TEXT, value TEXT, expires_at REAL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_by_expiry ON responses (expires_at)")
+        self._db.commit()
+    
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        if self.db_path:
+            self._connect()
+    
+    @staticmethod
+    def make_key(model_name, prompt, generation_config, system_instruction=None):
+        """Hash of everything that determines the model output"""
+        parts = [model_name, prompt, generation_config or {}]
+        if system_instruction:
+            parts.append(system_instruction)
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _count(self, feature, field):
+        counters = self._stats.setdefault(feature, {'hits': 0, 'misses': 0, 'disk_hits': 0})
+        counters[field] += 1
+    
+    def get(self, key, feature):
+        """Return the cached value or None on a miss"""
+        if self.ttls.get(feature, 0) <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._count(feature, 'hits')
+                return entry[0]
+            if entry:
+                del self._memory[key]
+            
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires_at FROM responses WHERE key = ?",
+                                       (key,)).fetchone()
+                if row and row[1] > now:
+                    self._store_memory(key, row[0], row[1])
+                    self._count(feature, 'hits')
+                    self._count(feature, 'disk_hits')
+                    return row[0]
+            
+            self._count(feature, 'misses')
+            return None
+    
+    def set(self, key, value, feature):
+        ttl = self.ttls.get(feature, 0)
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                                 (key, feature, value, expires_at))
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    self._purge()
+                self._db.commit()
+    
+    def _purge(self):
+        """Delete expired rows, then the soonest to expire past max_db_entries (lock held)"""
+        self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_db_entries
+        if excess > 0:
+            self._db.execute("""DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY expires_at LIMIT ?)""", (excess,))
+    
+    def _store_memory(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._stats.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+    
+    def stats(self):
+        """Hit/miss counters per feature for the health endpoint"""
+        with self._lock:
+            features = {name: dict(counters) for name, counters in self._stats.items()}
+            for counters in features.values():
+                lookups = counters['hits'] + counters['misses']
+                counters['hit_rate'] = round(counters['hits'] / lookups, 3) if lookups else 0.0
+            return {
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'persistent': self._db is not None,
+                'features': features
+            }
+
+class AnalysisCache:
+    """Persistent cache of finished document analysis results
+    
+    Results are stored as JSON in SQLite, keyed by content hash, and the
+    least recently used ones are evicted once the total stored size goes
+    over max_bytes.
+    """
+    def __init__(self, db_path, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bytes_saved': 0}
+        self.db_path = db_path
+        self._connect()
+        
+        # Forked workers (e.g. gunicorn --preload) must not share a connection
+        os.register_at_fork(after_in_child=self._after_fork)
+    
+    def _connect(self):
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY, value TEXT, size INTEGER, source_bytes INTEGER, last_used REAL)""")
+        self._db.commit()
+    
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._connect()
+    
+    def get(self, key):
+        """Return the cached result dict or None on a miss"""
+        with self._lock:
+            row = self._db.execute("SELECT value, source_bytes FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self._stats['hits'] += 1
+            self._stats['bytes_saved'] += row[1]
+        return json.loads(row[0])
+    
+    def set(self, key, result, source_bytes):
+        value = json.dumps(result)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                             (key, value, len(value), source_bytes, time.time()))
+            self._evict()
+            self._db.commit()
+    
+    def _evict(self):
+        """Drop least recently used results until under max_bytes (lock held)"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY last_used").fetchall():
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+    
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(self._stats,
+                        hit_rate=round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+                        entries=entries,
+                        size_bytes=size,
+                        max_bytes=self.max_bytes)
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Gemini while the circuit breaker is open"""
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in seconds"""
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, seconds):
+        index = next((i for i, bound in enumerate(self.BUCKETS) if seconds <= bound), len(self.BUCKETS))
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+    
+    def snapshot(self):
+        """Cumulative bucket counts keyed by upper bound"""
+        with self._lock:
+            counts, total = list(self.counts), self.total
+        cumulative, running = {}, 0
+        for bound, count in zip(self.BUCKETS + ('+Inf',), counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {'count': running, 'sum': round(total, 6), 'buckets': cumulative}
+
+class TokenHistogram(LatencyHistogram):
+    """Fixed-bucket histogram of token counts per request"""
+    BUCKETS = (16, 64, 256, 512, 1000, 2000, 4000, 8000, 16000, 32000)
+
+class GeminiClient:
+    """Resilient wrapper around GenerativeModel.generate_content
+    
+    Caps in-flight requests with a semaphore, applies a per-call deadline,
+    retries transient errors with exponential backoff and full jitter, and
+    opens a circuit breaker after repeated failures so callers go straight
+    to their fallback until the cooldown has passed.
+    """
+    TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+    
+    def __init__(self, max_in_flight=16, timeout=20.0, max_retries=2, backoff_base=0.5,
+                 backoff_max=4.0, breaker_threshold=5, breaker_cooldown=30.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+        self._histograms = {}
+        self._counters = {'calls': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+        self._feature_counters = Counter()  # (feature, counter name) -> count
+    
+    def is_open(self):
+        """True while the breaker is refusing calls (cooldown not yet over)"""
+        with self._lock:
+            return self._opened_at is not None and time.time() - self._opened_at < self.breaker_cooldown
+    
+    def _allow_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.time() - self._opened_at < self.breaker_cooldown or self._trial_in_progress:
+                return False
+            # Half-open: let a single trial call through
+            self._trial_in_progress = True
+            return True
+    
+    def _record_result(self, success, upstream_failure=True):
+        """Update the breaker after a call
+        
+        Only transient upstream failures (429/5xx, deadlines, connection
+        errors) count towards opening it. Pass upstream_failure=False for
+        failures that say nothing about Gemini's health, such as a rejected
+        or blocked prompt or no free local slot; they only end a half-open
+        trial.
+        """
+        with self._lock:
+            self._trial_in_progress = False
+            if not success and not upstream_failure:
+                return
+            if success:
+                self._consecutive_failures = 0
+                self._opened_at = None
+            else:
+                self._consecutive_failures += 1
+                self._counters['failures'] += 1
+                if self._consecutive_failures >= self.breaker_threshold or self._opened_at is not None:
+                    self._opened_at = time.time()
+    
+    def _observe(self, name, feature, value, histogram_type=LatencyHistogram):
+        key = (name, feature)
+        if key not in self._histograms:
+            with self._lock:
+                self._histograms.setdefault(key, histogram_type())
+        self._histograms[key].observe(value)
+    
+    def _record_usage(self, feature, usage, input_estimate, text):
+        """Token counts as reported by the API, or estimated from the text sent and received"""
+        input_tokens = getattr(usage, 'prompt_token_count', 0) or input_estimate
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or estimate_tokens(text)
+        self._observe('input_tokens', feature, input_tokens, TokenHistogram)
+        self._observe('output_tokens', feature, output_tokens, TokenHistogram)
+    
+    def is_transient(self, error):
+        return (isinstance(error, (TimeoutError, ConnectionError))
+                or getattr(error, 'code', None) in self.TRANSIENT_STATUS_CODES)
+    
+    def _admit(self, feature):
+        """Pass the breaker and take an in-flight slot; returns the call deadline"""
+        if not self._allow_call():
+            with self._lock:
+                self._counters['rejected'] += 1
+                self._feature_counters[(feature, 'rejected')] += 1
+            raise CircuitOpenError("Gemini circuit breaker is open")
+        
+        deadline = time.monotonic() + self.timeout
+        queued_at = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._record_result(False, upstream_failure=False)
+            with self._lock:
+                self._feature_counters[(feature, 'errors')] += 1
+            raise TimeoutError("Timed out waiting for a free Gemini request slot")
+        self._observe('queue_time', feature, time.monotonic() - queued_at)
+        return deadline
+    
+    def _retry_backoff(self, error, attempt, deadline, feature):
+        """Seconds to sleep before the next attempt, or None to give up"""
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if (attempt >= self.max_retries or not self.is_transient(error)
+                or time.monotonic() + backoff >= deadline):
+            self._record_result(False, upstream_failure=self.is_transient(error))
+            with self._lock:
+                self._feature_counters[(feature, 'errors')] += 1
+            return None
+        with self._lock:
+            self._counters['retries'] += 1
+            self._feature_counters[(feature, 'retries')] += 1
+        return backoff
+    
+    def generate(self, model, prompt, generation_config=None, feature='chat', input_tokens=None):
+        """Call the model within the deadline; raises on final failure
+        
+        input_tokens is the estimate recorded when the response carries
+        no usage metadata (defaults to the prompt's estimate).
+        """
+        deadline = self._admit(feature)
+        try:
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                started = time.monotonic()
+                try:
+                    with self._lock:
+                        self._counters['calls'] += 1
+                        self._feature_counters[(feature, 'calls')] += 1
+                    response = model.generate_content(
+                        prompt,
+                        generation_config=generation_config,
+                        request_options={'timeout': max(remaining, 0.1)}
+                    )
+                    text = response.text
+                    self._observe('upstream_latency', feature, time.monotonic() - started)
+                    self._record_result(True)
+                    self._record_usage(feature, getattr(response, 'usage_metadata', None),
+                                       input_tokens or estimate_tokens(prompt), text)
+                    return text
+                except Exception as e:
+                    self._observe('upstream_latency', feature, time.monotonic() - started)
+                    backoff = self._retry_backoff(e, attempt, deadline, feature)
+                    if backoff is None:
+                        raise
+                    attempt += 1
+                    time.sleep(backoff)
+        finally:
+            self._slots.release()
+    
+    def generate_stream(self, model, prompt, generation_config=None, feature='chat', input_tokens=None):
+        """Yield text chunks as the model produces them
+        
+        Failures before the first chunk are retried like generate(); once
+        text has been handed to the caller an error is raised as is.
+        """
+        deadline = self._admit(feature)
+        try:
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                started = time.monotonic()
+                streamed = False
+                received, usage = [], None
+                try:
+                    with self._lock:
+                        self._counters['calls'] += 1
+                        self._feature_counters[(feature, 'calls')] += 1
+                    response = model.generate_content(
+                        prompt,
+                        generation_config=generation_config,
+                        stream=True,
+                        request_options={'timeout': max(remaining, 0.1)}
+                    )
+                    for chunk in response:
+                        if not streamed:
+                            self._observe('first_token_latency', feature, time.monotonic() - started)
+                            streamed = True
+                        # Usage metadata is cumulative; the last chunk has the totals
+                        usage = getattr(chunk, 'usage_metadata', None) or usage
+                        if chunk.text:
+                            received.append(chunk.text)
+                            yield chunk.text
+                    self._observe('upstream_latency', feature, time.monotonic() - started)
+                    self._record_result(True)
+                    self._record_usage(feature, usage, input_tokens or estimate_tokens(prompt), ''.join(received))
+                    return
+                except GeneratorExit:
+                    # Caller stopped reading (client went away) after tokens arrived
+                    self._record_result(True)
+                    self._record_usage(feature, usage, input_tokens or estimate_tokens(prompt), ''.join(received))
+                    raise
+                except Exception as e:
+                    self._observe('upstream_latency', feature, time.monotonic() - started)
+                    if streamed:
+                        self._record_result(False, upstream_failure=self.is_transient(e))
+                        with self._lock:
+                            self._feature_counters[(feature, 'errors')] += 1
+                        raise
+                    backoff = self._retry_backoff(e, attempt, deadline, feature)
+                    if backoff is None:
+                        raise
+                    attempt += 1
+                    time.sleep(backoff)
+        finally:
+            self._slots.release()
+    
+    def stats(self):
+        with self._lock:
+            state = 'closed' if self._opened_at is None else ('open' if time.time() - self._opened_at < self.breaker_cooldown else 'half-open')
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+            feature_counters = dict(self._feature_counters)
+        result = dict(counters, circuit=state, max_in_flight=self.max_in_flight, by_feature={}, histograms={})
+        for (feature, name), count in feature_counters.items():
+            result['by_feature'].setdefault(feature, {})[name] = count
+        for (name, feature), histogram in histograms.items():
+            result['histograms'].setdefault(name, {})[feature] = histogram.snapshot()
+        return result
+
 class AIConfig:
     def __init__(self):
         # Gemini API Configuration
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         self.model_name = "gemini-1.5-flash"  # Fast and free model
         
-        # Configure Gemini
-        if self.gemini_api_key:
-            genai.configure(api_key=self.gemini_api_key)
-            self.gemini_model = genai.GenerativeModel(self.model_name)
-        else:
-            self.gemini_model = None
+        # Gemini is configured on first use (see gemini_model)
+        self._gemini_model = None
+        self._instructed_models = {}  # System instruction -> model (see model_for)
+        self._gemini_lock = threading.Lock()
+        if not self.gemini_api_key:
             print("⚠️  GEMINI_API_KEY not found. Using fallback TextBlob.")
+        
+        # Startup: NLTK data is only read from local paths (never downloaded),
+        # and WARM_UP=1 loads heavy libraries before workers are forked
+        self.nltk_data_dir = os.getenv('NLTK_DATA_DIR',
+                                       os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data'))
+        self.warm_up = os.getenv('WARM_UP', '0').lower() in ('1', 'true', 'yes')
+        
+        # Chat mode: 'combined' (reply + sentiment in one call),
+        # 'concurrent' (two calls in parallel) or 'sequential'
+        self.chat_mode = os.getenv('CHAT_MODE', 'combined').lower()
+        
+        # Structured JSON logs on stderr; debug/info records are sampled at
+        # LOG_SAMPLE_RATE (0-1), warnings and errors are always written
+        self.log_level = os.getenv('LOG_LEVEL', 'INFO')
+        self.log_sample_rate = float(os.getenv('LOG_SAMPLE_RATE', '1'))
+        
+        # Conversation memory per chat session: recent turns kept verbatim,
+        # token budget for history in each prompt, and process-wide limits
+        self.chat_history_turns = int(os.getenv('CHAT_HISTORY_TURNS', '6'))
+        self.chat_context_tokens = int(os.getenv('CHAT_CONTEXT_TOKENS', '600'))
+        self.chat_digest_tokens = int(os.getenv('CHAT_DIGEST_TOKENS', '150'))
+        self.chat_max_sessions = int(os.getenv('CHAT_MAX_SESSIONS', '10000'))
+        self.chat_memory_max_mb = int(os.getenv('CHAT_MEMORY_MAX_MB', '64'))
+        self.chat_session_ttl = int(os.getenv('CHAT_SESSION_TTL', '3600'))
+        
+        # Sentiment micro-batching: messages arriving within the window (ms) are
+        # classified together in one Gemini call; batch size 1 disables batching
+        self.sentiment_batch_window_ms = float(os.getenv('SENTIMENT_BATCH_WINDOW_MS', '20'))
+        self.sentiment_batch_size = int(os.getenv('SENTIMENT_BATCH_SIZE', '16'))
+        self.sentiment_batch_workers = int(os.getenv('SENTIMENT_BATCH_WORKERS', '4'))
+        
+        # Local sentiment model: primary classifier without Gemini, and an
+        # optional pre-filter that skips the Gemini call at or above this
+        # confidence (0 = off; held-out precision tops out near 87%, see
+        # `python sentiment_model.py train`)
+        self.sentiment_model_path = os.getenv('SENTIMENT_MODEL_PATH') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'models', 'sentiment_model.npz')
+        self.sentiment_prefilter_confidence = float(os.getenv('SENTIMENT_PREFILTER_CONFIDENCE', '0'))
+        
+        # Shared executor for running Gemini calls concurrently
+        self.max_workers = int(os.getenv('GEMINI_MAX_WORKERS', '8'))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                           thread_name_prefix='gemini')
+        
+        # PDF extraction: documents with at least this many pages are split
+        # across a process pool of pdf_workers processes
+        self.pdf_workers = int(os.getenv('PDF_WORKERS', str(os.cpu_count() or 1)))
+        self.pdf_parallel_min_pages = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '50'))
+        
+        # Extractive fallback summary: sentence budget and 'tf' or 'tfidf' weights
+        self.summary_max_sentences = int(os.getenv('SUMMARY_MAX_SENTENCES', '3'))
+        self.summary_weighting = os.getenv('SUMMARY_WEIGHTING', 'tf').lower()
+        
+        # Key concept counting: 'approximate' keeps the top phrases in a fixed
+        # number of Space-Saving counters, 'exact' counts every distinct phrase
+        self.concept_counting = os.getenv('CONCEPT_COUNTING', 'approximate').lower()
+        self.concept_capacity = int(os.getenv('CONCEPT_CAPACITY', '2048'))
+        
+        # Map-reduce summarization for texts longer than one chunk
+        self.summary_chunk_tokens = int(os.getenv('SUMMARY_CHUNK_TOKENS', '3000'))
+        self.summary_concurrency = int(os.getenv('SUMMARY_CONCURRENCY', '4'))
+        
+        # Hedged requests: /api/chat and /api/summarize answer from the local
+        # engine when Gemini has not replied within the route's SLO in ms (0
+        # waits for Gemini). The Gemini call still completes and its reply is
+        # cached (CACHE_TTL_*) for the next identical request; HEDGE_WORKERS
+        # caps the calls racing at once
+        self.hedge_slo_ms = {
+            'chat': float(os.getenv('HEDGE_SLO_CHAT_MS', '0')),
+            'summarize': float(os.getenv('HEDGE_SLO_SUMMARIZE_MS', '0')),
+        }
+        self.hedge_workers = int(os.getenv('HEDGE_WORKERS', '16'))
+        
+        # Input token budget per Gemini request and feature, system instruction
+        # included (per message for sentiment batches); longer user text is
+        # trimmed to its beginning and end. 0 disables the limit
+        self.prompt_token_budgets = {
+            'chat': int(os.getenv('PROMPT_BUDGET_CHAT', '2000')),
+            'sentiment': int(os.getenv('PROMPT_BUDGET_SENTIMENT', '300')),
+            'summary': int(os.getenv('PROMPT_BUDGET_SUMMARY', '4000')),
+        }
+        
+        # Background jobs for uploads: worker threads, queue depth before
+        # 429 responses, per-job timeout and how long results are kept
+        self.job_workers = int(os.getenv('JOB_WORKERS', '2'))
+        self.job_max_pending = int(os.getenv('JOB_MAX_PENDING', '16'))
+        self.job_timeout = int(os.getenv('JOB_TIMEOUT', '600'))
+        self.job_result_ttl = int(os.getenv('JOB_RESULT_TTL', '3600'))
+        # Job state is shared by all web workers through this SQLite file, so a
+        # poll may land on any of them (empty keeps it in memory: one worker only)
+        self.job_store_db = os.getenv('JOB_STORE_DB', 'jobs.db') or ':memory:'
+        
+        # Batch processing of many documents (API and process_folder.py):
+        # processes in the shared pool, documents per batch, and the most
+        # a zip archive may expand to
+        self.batch_workers = int(os.getenv('BATCH_WORKERS', str(os.cpu_count() or 1)))
+        self.batch_max_files = int(os.getenv('BATCH_MAX_FILES', '1000'))
+        self.batch_max_extracted_mb = int(os.getenv('BATCH_MAX_EXTRACTED_MB', '1000'))
+        
+        # Upload size limits in MB, enforced while the body is streamed
+        self.upload_max_mb_pdf = int(os.getenv('UPLOAD_MAX_MB_PDF', '50'))
+        self.upload_max_mb_media = int(os.getenv('UPLOAD_MAX_MB_MEDIA', '200'))
+        self.upload_max_mb_other = int(os.getenv('UPLOAD_MAX_MB_OTHER', '10'))
+        self.upload_max_mb_archive = int(os.getenv('UPLOAD_MAX_MB_ARCHIVE', '200'))
+        
+        # Local speech-to-text (Whisper on CPU worker processes)
+        self.whisper_model = os.getenv('WHISPER_MODEL', 'base')
+        self.transcribe_workers = int(os.getenv('TRANSCRIBE_WORKERS', str(max(1, (os.cpu_count() or 1) // 2))))
+        self.transcribe_threads_per_worker = int(os.getenv('TRANSCRIBE_THREADS_PER_WORKER', '1'))
+        self.transcribe_window_seconds = int(os.getenv('TRANSCRIBE_WINDOW_SECONDS', '30'))
+        
+        # Production serving (gunicorn.conf.py). SERVER_PROFILE picks defaults:
+        # 'io' = few processes with many threads for Gemini-bound routes,
+        # 'cpu' = one single-threaded process per core for PDF/text routes,
+        # 'all' = one mixed pool serving every route
+        self.server_profile = os.getenv('SERVER_PROFILE', 'all').lower()
+        cpu_count = os.cpu_count() or 1
+        default_workers, default_threads = {
+            'io': (2, 32),
+            'cpu': (cpu_count, 1),
+        }.get(self.server_profile, (cpu_count, 8))
+        self.web_workers = int(os.getenv('WEB_WORKERS', str(default_workers)))
+        self.web_threads = int(os.getenv('WEB_THREADS', str(default_threads)))
+        self.server_bind = os.getenv('SERVER_BIND', '0.0.0.0:5000')
+        self.web_timeout = int(os.getenv('WEB_TIMEOUT', '120'))
+        
+        # Gemini client resilience: in-flight cap, per-call deadline (seconds),
+        # retries with backoff for transient errors, and circuit breaker
+        self.gemini_client = GeminiClient(
+            max_in_flight=int(os.getenv('GEMINI_MAX_IN_FLIGHT', '16')),
+            timeout=float(os.getenv('GEMINI_TIMEOUT', '20')),
+            max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '2')),
+            backoff_base=float(os.getenv('GEMINI_BACKOFF_BASE', '0.5')),
+            backoff_max=float(os.getenv('GEMINI_BACKOFF_MAX', '4')),
+            breaker_threshold=int(os.getenv('GEMINI_BREAKER_THRESHOLD', '5')),
+            breaker_cooldown=float(os.getenv('GEMINI_BREAKER_COOLDOWN', '30'))
+        )
+        
+        # Response cache (TTL in seconds per feature, 0 disables caching)
+        self.response_cache = ResponseCache(
+            max_entries=int(os.getenv('GEMINI_CACHE_SIZE', '1024')),
+            db_path=os.getenv('GEMINI_CACHE_DB') or None,
+            max_db_entries=int(os.getenv('GEMINI_CACHE_DB_MAX_ENTRIES', '100000')),
+            ttls={
+                'chat': int(os.getenv('CACHE_TTL_CHAT', '300')),
+                'sentiment': int(os.getenv('CACHE_TTL_SENTIMENT', '86400')),
+                'summary': int(os.getenv('CACHE_TTL_SUMMARY', '86400')),
+            }
+        )
+        
+        # Finished PDF/text analysis results, keyed by content hash
+        self.analysis_cache = AnalysisCache(
+            db_path=os.getenv('ANALYSIS_CACHE_DB', 'analysis_cache.db') or ':memory:',
+            max_bytes=int(os.getenv('ANALYSIS_CACHE_MAX_MB', '100')) * 1024 * 1024
+        )
+        
+        # Full-text search index over processed notes (empty keeps it in memory)
+        self.search_index_db = os.getenv('SEARCH_INDEX_DB', 'search_index.db') or ':memory:'
+    
+    @property
+    def gemini_model(self):
+        """Gemini model, importing and configuring the SDK on first access"""
+        if self._gemini_model is None and self.gemini_api_key:
+            with self._gemini_lock:
+                if self._gemini_model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.gemini_api_key)
+                    self._gemini_model = genai.GenerativeModel(self.model_name)
+        return self._gemini_model
+    
+    @gemini_model.setter
+    def gemini_model(self, model):
+        self._gemini_model = model
+        self._instructed_models = {}
+    
+    def model_for(self, system_instruction=None):
+        """Gemini model created with system_instruction, one per distinct instruction
+        
+        The instruction is part of the model rather than of every prompt,
+        so call sites only build and send the user turn.
+        """
+        model = self.gemini_model
+        if not system_instruction or model is None:
+            return model
+        instructed = self._instructed_models.get(system_instruction)
+        if instructed is None:
+            with self._gemini_lock:
+                instructed = self._instructed_models.get(system_instruction)
+                if instructed is None:
+                    import google.generativeai as genai
+                    instructed = genai.GenerativeModel(self.model_name, system_instruction=system_instruction)
+                    self._instructed_models[system_instruction] = instructed
+        return instructed
     
     def is_gemini_available(self):
-        """Check if Gemini is properly configured"""
-        return self.gemini_model is not None
+        """Check if Gemini is configured and not cut off by the circuit breaker"""
+        configured = self._gemini_model is not None or bool(self.gemini_api_key)
+        return configured and not self.gemini_client.is_open()
+    
+    def estimate_tokens(self, text):
+        """Rough token count (~4 characters per token for English)"""
+        return estimate_tokens(text)
+    
+    def generate_text(self, prompt, generation_config=None, feature='chat', system_instruction=None):
+        """Generate text with Gemini, serving repeated requests from the cache"""
+        key = ResponseCache.make_key(self.model_name, prompt, generation_config, system_instruction)
+        cached = self.response_cache.get(key, feature)
+        if cached is not None:
+            return cached
+        
+        input_tokens = estimate_tokens(prompt) + (estimate_tokens(system_instruction) if system_instruction else 0)
+        text = self.gemini_client.generate(self.model_for(system_instruction), prompt, generation_config,
+                                           feature, input_tokens)
+        self.response_cache.set(key, text, feature)
+        return text
+    
+    def stream_text(self, prompt, generation_config=None, feature='chat', system_instruction=None):
+        """Yield the response in chunks as Gemini generates it
+        
+        A cached response is yielded whole; a fresh one is cached once the
+        stream completes.
+        """
+        key = ResponseCache.make_key(self.model_name, prompt, generation_config, system_instruction)
+        cached = self.response_cache.get(key, feature)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        input_tokens = estimate_tokens(prompt) + (estimate_tokens(system_instruction) if system_instruction else 0)
+        for text in self.gemini_client.generate_stream(self.model_for(system_instruction), prompt,
+                                                       generation_config, feature, input_tokens):
+            parts.append(text)
+            yield text
+        self.response_cache.set(key, ''.join(parts), feature)
+    
+    async def generate_text_async(self, prompt, generation_config=None, feature='chat', system_instruction=None):
+        """Awaitable generate_text, run on the shared executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.generate_text, prompt, generation_config,
+                                          feature, system_instruction)
     
     def get_generation_config(self):
         """Optimized settings for student use cases"""
@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for StudyByte
+Settings come from AIConfig (see README); SERVER_PROFILE selects the worker model
+"""
+import gc
+
+from config import ai_config
+
+bind = ai_config.server_bind
+workers = ai_config.web_workers
+threads = ai_config.web_threads
+worker_class = 'gthread' if ai_config.web_threads > 1 else 'sync'
+timeout = ai_config.web_timeout
+
+# Import the app (and the MentalHealthBot/TextSummarizer/PDFProcessor
+# singletons) once in the master, warmed up, so forked workers share it
+preload_app = True
+ai_config.warm_up = True
+
+def when_ready(server):
+    # Keep the garbage collector in workers from touching preloaded objects,
+    # which would copy their pages into every worker
+    gc.freeze()
@@ -0,0 +1,160 @@
+"""
+Metrics and Logging for Student Companion
+In-process counters and latency histograms exported in Prometheus text format,
+and JSON structured logging with sampling of debug/info records
+"""
+import sys
+import json
+import random
+import logging
+import threading
+
+from config import LatencyHistogram, ai_config
+
+PREFIX = 'studybyte_'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return '{' + pairs + '}'
+
+def _histogram_lines(name, labels, snapshot):
+    lines = []
+    for bound, count in snapshot['buckets'].items():
+        lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {count}")
+    lines.append(f"{name}_sum{_label_text(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_label_text(labels)} {snapshot['count']}")
+    return lines
+
+class Metrics:
+    """Counters and histograms keyed by name and label set
+
+    Recording is a dict update under a lock (or a lock-free histogram
+    lookup once the series exists), so it is cheap enough for every
+    request. Collectors registered with add_collector() supply values
+    that other components already track, read only at scrape time.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        histogram.observe(seconds)
+
+    def add_collector(self, collector):
+        """collector() returns [(name, kind, help, [(labels dict, value or histogram snapshot)])]"""
+        self._collectors.append(collector)
+
+    def render(self):
+        """All series in Prometheus text exposition format"""
+        families = {}
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = list(self._histograms.items())
+        for (name, labels), value in counters:
+            families.setdefault(name, []).append((labels, value))
+        for (name, labels), histogram in histograms:
+            families.setdefault(name, []).append((labels, histogram.snapshot()))
+
+        described = dict(self._help)
+        for collector in self._collectors:
+            try:
+                for name, kind, help_text, samples in collector():
+                    described[name] = (kind, help_text)
+                    families.setdefault(name, []).extend(
+                        (tuple(sorted(labels.items())), value) for labels, value in samples)
+            except Exception as e:
+                log.warning('metrics_collector_failed', error=str(e))
+
+        lines = []
+        for name in sorted(families):
+            full_name = PREFIX + name
+            kind, help_text = described.get(name, ('untyped', ''))
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in families[name]:
+                if isinstance(value, dict):
+                    lines.extend(_histogram_lines(full_name, labels, value))
+                else:
+                    lines.append(f"{full_name}{_label_text(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class EventLogger:
+    """Structured logger: log.info('event_name', key=value, ...)
+
+    Disabled levels return before any formatting. Debug and info records
+    are kept with probability sample_rate; warnings and errors always are.
+    """
+    def __init__(self, name='studybyte', level='INFO', sample_rate=1.0):
+        self.logger = logging.getLogger(name)
+        if not self.logger.handlers:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(JsonFormatter())
+            self.logger.addHandler(handler)
+            self.logger.propagate = False
+        self.logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+        self.sample_rate = sample_rate
+
+    def _log(self, level, event, fields, exc_info=False):
+        if not self.logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING and self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        self.logger.log(level, event, exc_info=exc_info, extra={'fields': fields})
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, exc_info=False, **fields):
+        self._log(logging.ERROR, event, fields, exc_info)
+
+metrics = Metrics()
+metrics.describe('http_request_duration_seconds', 'histogram',
+                 'Time until the response starts, per route (streamed bodies continue after this)')
+metrics.describe('http_requests_total', 'counter', 'Requests per route, method and status code')
+metrics.describe('fallback_activations_total', 'counter', 'Times a local fallback replaced Gemini, per feature')
+metrics.describe('upload_bytes_total', 'counter', 'Bytes received in file uploads')
+metrics.describe('pdf_pages_total', 'counter', 'PDF pages extracted and analyzed')
+metrics.describe('pdf_processing_seconds_total', 'counter',
+                 'Wall time spent extracting and analyzing PDF pages; pages/s = rate(pages) / rate(seconds)')
+
+log = EventLogger(level=ai_config.log_level, sample_rate=ai_config.log_sample_rate)
@@ -0,0 +1,26 @@
+"""
+Parallel PDF Text Extraction for Student Companion
+Splits page ranges across a process pool; each worker opens the file itself
+"""
+import math
+
+def extract_page_range(pdf_path, start, stop):
+    """Extract text for pages [start, stop) inside a worker process"""
+    import PyPDF2
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[index].extract_text() or '' for index in range(start, stop)]
+
+def iter_pages_parallel(pdf_path, total_pages, executor, workers):
+    """Yield page text in document order while later chunks are still running"""
+    # Two chunks per worker balances uneven pages against re-opening the file
+    chunk_size = max(1, math.ceil(total_pages / (workers * 2)))
+    futures = [executor.submit(extract_page_range, pdf_path, start, min(start + chunk_size, total_pages))
+               for start in range(0, total_pages, chunk_size)]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        # Drop queued chunks if the consumer stops early
+        for future in futures:
+            future.cancel()
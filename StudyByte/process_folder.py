@@ -0,0 +1,106 @@
+"""
+Batch Processing CLI for Student Companion
+Runs PDFProcessor (and optionally TextSummarizer) over every PDF, .txt and .md
+file in a folder on the shared batch worker pool, writing one NDJSON result per
+document as it finishes. A manifest records finished documents by content hash,
+so an interrupted run picks up where it stopped.
+
+Usage: python process_folder.py COURSE_DIR [--output results.ndjson] [--manifest PATH]
+                                [--summarize] [--workers N] [--no-cache]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from student_companion_clean import DOCUMENT_EXTENSIONS, BatchProcessor, hash_file
+
+DEFAULT_MANIFEST = '.studybyte-manifest.ndjson'
+
+def find_documents(directory, manifest_path):
+    """Supported files under directory in a stable order, skipping hidden files"""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if (not name.startswith('.') and os.path.splitext(name)[1].lower() in DOCUMENT_EXTENSIONS
+                    and os.path.abspath(path) != os.path.abspath(manifest_path)):
+                paths.append(path)
+    return paths
+
+def load_manifest(path):
+    """Content hashes of documents finished by earlier runs"""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Last line of a run that was killed mid-write
+            if entry.get('status') == 'done':
+                completed.add(entry['content_hash'])
+    return completed
+
+def append_line(file, entry, sync=False):
+    file.write(json.dumps(entry) + '\n')
+    file.flush()
+    if sync:
+        os.fsync(file.fileno())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help='folder of course material')
+    parser.add_argument('--output', default='-', help='NDJSON results file, appended to (default: stdout)')
+    parser.add_argument('--manifest', help=f'resume manifest (default: DIRECTORY/{DEFAULT_MANIFEST})')
+    parser.add_argument('--summarize', action='store_true', help='also summarize each document with TextSummarizer')
+    parser.add_argument('--workers', type=int, help='worker processes (default: BATCH_WORKERS)')
+    parser.add_argument('--no-cache', action='store_true', help='ignore cached analysis results')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"{args.directory} is not a directory")
+    manifest_path = args.manifest or os.path.join(args.directory, DEFAULT_MANIFEST)
+    paths = find_documents(args.directory, manifest_path)
+    completed = load_manifest(manifest_path)
+
+    from config import ai_config
+    processor = BatchProcessor(workers=args.workers or ai_config.batch_workers)
+
+    def documents():
+        # Hashed lazily, so the first documents start while the rest are read
+        for path in paths:
+            name = os.path.relpath(path, args.directory)
+            yield name, path, hash_file(path)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    try:
+        with open(manifest_path, 'a', encoding='utf-8') as manifest:
+            finished = 0
+            for event in processor.run(documents(), completed, args.summarize, not args.no_cache):
+                if event['event'] == 'summary':
+                    print(f"{event['done']} done, {event['failed']} failed, {event['skipped']} skipped "
+                          f"in {event['seconds']:.1f}s", file=sys.stderr)
+                    return 1 if event['failed'] else 0
+                
+                finished += 1
+                print(f"[{finished}/{len(paths)}] {event['status']:<7} {event['name']}", file=sys.stderr)
+                if event['status'] == 'skipped':
+                    continue
+                append_line(output, event)
+                # The result is written before the manifest line, so a resumed
+                # run never skips a document whose result was lost
+                append_line(manifest, {'name': event['name'], 'content_hash': event['content_hash'],
+                                       'status': event['status'], 'finished_at': time.time()}, sync=True)
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun to resume from {manifest_path}", file=sys.stderr)
+        return 130
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
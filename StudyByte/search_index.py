@@ -0,0 +1,169 @@
+"""
+Search Index for Student Companion
+Persistent SQLite FTS5 index over processed notes (names, key concepts, key points
+and summaries) with BM25-ranked search and concept co-occurrence lookups
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT UNIQUE NOT NULL,
+    kind TEXT,
+    name TEXT,
+    key_concepts TEXT,
+    key_points TEXT,
+    summary TEXT,
+    added_at REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    name, key_concepts, key_points, summary,
+    content='documents', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS concepts (
+    id INTEGER PRIMARY KEY,
+    concept TEXT UNIQUE NOT NULL,
+    documents INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS concept_pairs (
+    concept_id INTEGER NOT NULL,
+    other_id INTEGER NOT NULL,
+    documents INTEGER NOT NULL,
+    PRIMARY KEY (concept_id, other_id)
+) WITHOUT ROWID;
+"""
+
+class SearchIndex:
+    """Full-text index of finished document analysis, keyed by content hash
+
+    The notes text is stored once, in documents; the FTS5 table reads it
+    from there (external content) and holds only the inverted index.
+    Concept co-occurrence counts are updated as each document is added,
+    so a lookup is one primary-key range scan.
+    
+    BM25 is computed for every match before the top results are known,
+    so a query matching a large share of the index only ranks its
+    max_ranked newest matches, and search() says so (truncated); rarer
+    queries are ranked in full.
+    """
+    # BM25 column weights: name, key_concepts, key_points, summary
+    WEIGHTS = (2.0, 3.0, 1.5, 1.0)
+
+    def __init__(self, db_path, max_ranked=2000):
+        self.db_path = db_path
+        self.max_ranked = max_ranked
+        self._lock = threading.Lock()
+        self._connect()
+
+        # Forked workers (e.g. gunicorn --preload) must not share a connection
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _connect(self):
+        # Batch workers and web workers may write at once; wait for the lock
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last adds can be lost
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._connect()
+
+    def add(self, content_hash, kind, name, result):
+        """Index one analysis result; returns False if the content is already indexed"""
+        key_concepts = [concept for concept in result.get('key_concepts') or [] if concept.strip()]
+        concepts = sorted({concept.strip().lower() for concept in key_concepts})
+        fields = (name or '', '\n'.join(key_concepts), '\n'.join(result.get('key_points') or []),
+                  result.get('summary') or '')
+
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM documents WHERE content_hash = ?", (content_hash,)).fetchone():
+                return False
+            with self._db:
+                doc_id = self._db.execute(
+                    "INSERT INTO documents (content_hash, kind, name, key_concepts, key_points, summary, added_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", (content_hash, kind) + fields + (time.time(),)).lastrowid
+                self._db.execute("INSERT INTO documents_fts (rowid, name, key_concepts, key_points, summary) "
+                                 "VALUES (?, ?, ?, ?, ?)", (doc_id,) + fields)
+
+                concept_ids = [self._db.execute(
+                    "INSERT INTO concepts (concept, documents) VALUES (?, 1) "
+                    "ON CONFLICT (concept) DO UPDATE SET documents = documents + 1 RETURNING id",
+                    (concept,)).fetchone()[0] for concept in concepts]
+                self._db.executemany(
+                    "INSERT INTO concept_pairs VALUES (?, ?, 1) "
+                    "ON CONFLICT DO UPDATE SET documents = documents + 1",
+                    [(a, b) for a in concept_ids for b in concept_ids if a != b])
+        return True
+
+    @staticmethod
+    def match_expression(query):
+        """FTS5 query matching every word of the user's query, taken literally"""
+        return ' '.join(f'"{term}"' for term in re.findall(r'\w+', query.lower()))
+
+    def search(self, query, limit=10):
+        """BM25-ranked documents matching all words of query, best first
+        
+        Returns (results, truncated); truncated is True when older matches
+        beyond the max_ranked newest were not ranked.
+        """
+        expression = self.match_expression(query)
+        if not expression:
+            return [], False
+        with self._lock:
+            # Walking matches in rowid order is cheap; scoring them is not
+            boundary = self._db.execute(
+                "SELECT rowid FROM documents_fts WHERE documents_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (expression, self.max_ranked - 1)).fetchone()
+            ranked = self._db.execute(
+                """SELECT rowid, bm25(documents_fts, ?, ?, ?, ?) AS score FROM documents_fts
+                   WHERE documents_fts MATCH ? AND rowid >= ? ORDER BY score LIMIT ?""",
+                self.WEIGHTS + (expression, boundary[0] if boundary else 0, limit)).fetchall()
+            
+            # Snippets only for the rows returned, not for every row scored
+            results = []
+            for doc_id, score in ranked:
+                content_hash, kind, name, key_concepts, snippet = self._db.execute(
+                    """SELECT d.content_hash, d.kind, d.name, d.key_concepts,
+                              snippet(documents_fts, 3, '[', ']', '…', 16)
+                       FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+                       WHERE documents_fts MATCH ? AND documents_fts.rowid = ?""", (expression, doc_id)).fetchone()
+                results.append({
+                    'content_hash': content_hash,
+                    'kind': kind,
+                    'name': name,
+                    'key_concepts': key_concepts.split('\n') if key_concepts else [],
+                    'snippet': snippet,
+                    'score': float(f"{-score:.4g}")  # FTS5 ranks lower = better
+                })
+        return results, boundary is not None
+
+    def related_concepts(self, concept, limit=10):
+        """Concepts that appear in the same documents as concept, most shared first"""
+        with self._lock:
+            row = self._db.execute("SELECT id, documents FROM concepts WHERE concept = ?",
+                                   (concept.strip().lower(),)).fetchone()
+            if row is None:
+                return {'concept': concept, 'documents': 0, 'related': []}
+            concept_id, documents = row
+            related = self._db.execute(
+                """SELECT c.concept, p.documents FROM concept_pairs p JOIN concepts c ON c.id = p.other_id
+                   WHERE p.concept_id = ? ORDER BY p.documents DESC LIMIT ?""", (concept_id, limit)).fetchall()
+        return {
+            'concept': concept,
+            'documents': documents,
+            'related': [{'concept': other, 'documents': shared} for other, shared in related]
+        }
+
+    def stats(self):
+        with self._lock:
+            documents = self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            concepts = self._db.execute("SELECT COUNT(*) FROM concepts").fetchone()[0]
+            pages, page_size = (self._db.execute("PRAGMA page_count").fetchone()[0],
+                                self._db.execute("PRAGMA page_size").fetchone()[0])
+        return {'documents': documents, 'concepts': concepts, 'size_bytes': pages * page_size}
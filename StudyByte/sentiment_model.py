@@ -0,0 +1,146 @@
+"""
+Local Sentiment Model for Student Companion
+A linear classifier over hashed character n-grams, trained on models/sentiment_seed.tsv
+and stored as plain NumPy arrays so loading it never unpickles code
+
+Train: python sentiment_model.py train [--seed models/sentiment_seed.tsv] [--output models/sentiment_model.npz]
+"""
+import os
+import re
+import sys
+import argparse
+
+import numpy as np
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+DEFAULT_SEED_PATH = os.path.join(MODEL_DIR, 'sentiment_seed.tsv')
+DEFAULT_MODEL_PATH = os.path.join(MODEL_DIR, 'sentiment_model.npz')
+
+# Character n-grams within word boundaries hold up better than word n-grams
+# on a small seed set (inflections, typos) and cost the same to hash
+N_FEATURES = 2 ** 16
+ANALYZER = 'char_wb'
+NGRAM_RANGE = (3, 5)
+
+# Stress words shift a message towards negative; one alternation, one pass
+STRESS_KEYWORDS = ['stress', 'anxious', 'worried', 'overwhelmed', 'panic']
+STRESS_PATTERN = re.compile('|'.join(map(re.escape, STRESS_KEYWORDS)), re.IGNORECASE)
+STRESS_LOGIT_BOOST = 1.0
+
+def make_vectorizer(n_features=N_FEATURES, analyzer=ANALYZER, ngram_range=NGRAM_RANGE):
+    """Stateless hashing vectorizer; training and inference must agree on it"""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(n_features=n_features, analyzer=analyzer, ngram_range=ngram_range,
+                             alternate_sign=False, norm='l2')
+
+def load_seed(path):
+    labels, texts = [], []
+    with open(path, encoding='utf-8') as f:
+        next(f)  # Header
+        for line in f:
+            label, _, text = line.rstrip('\r\n').partition('\t')
+            if text:
+                labels.append(label)
+                texts.append(text)
+    return labels, texts
+
+class SentimentModel:
+    """Multinomial logistic regression weights plus the hashing setup"""
+    def __init__(self, classes, coef, intercept, n_features=N_FEATURES, analyzer=ANALYZER, ngram_range=NGRAM_RANGE):
+        self.classes = np.asarray(classes)
+        self.coef = np.asarray(coef, dtype=np.float32)
+        self.intercept = np.asarray(intercept, dtype=np.float32)
+        self.vectorizer = make_vectorizer(n_features, analyzer, tuple(ngram_range))
+        self._negative = int(np.flatnonzero(self.classes == 'negative')[0])
+        from sklearn.utils import murmurhash3_32
+        self._hash = murmurhash3_32
+        self._analyzer = self.vectorizer.build_analyzer()
+        self.n_features = n_features
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        data = np.load(path)
+        return cls(data['classes'].astype(str), data['coef'], data['intercept'],
+                   int(data['n_features']), str(data['analyzer']), tuple(data['ngram_range']))
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        np.savez_compressed(path, classes=self.classes, coef=self.coef, intercept=self.intercept,
+                            n_features=self.vectorizer.n_features, analyzer=self.vectorizer.analyzer,
+                            ngram_range=np.array(self.vectorizer.ngram_range))
+
+    @classmethod
+    def train(cls, labels, texts, C=10.0):
+        from sklearn.linear_model import LogisticRegression
+        vectorizer = make_vectorizer()
+        classifier = LogisticRegression(C=C, max_iter=1000)
+        classifier.fit(vectorizer.transform(texts), labels)
+        return cls(classifier.classes_, classifier.coef_, classifier.intercept_)
+
+    def _decide(self, logits, stressed):
+        logits[stressed, self._negative] += STRESS_LOGIT_BOOST
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        return self.classes[best].tolist(), probabilities[np.arange(len(logits)), best].tolist()
+
+    def predict_batch(self, texts):
+        """Labels and confidences (max class probability) for a list of texts"""
+        logits = self.vectorizer.transform(texts) @ self.coef.T + self.intercept
+        stressed = np.fromiter((STRESS_PATTERN.search(text) is not None for text in texts),
+                               dtype=bool, count=len(texts))
+        return self._decide(logits, stressed)
+
+    def predict(self, text):
+        """Single-message fast path
+        
+        Hashes the n-grams directly, exactly as HashingVectorizer does, and
+        gathers only the weight columns they hit; a vectorizer call carries
+        about 1 ms of fixed overhead, several times the actual work.
+        """
+        counts = {}
+        for gram in self._analyzer(text):
+            index = abs(self._hash(gram, seed=0)) % self.n_features
+            counts[index] = counts.get(index, 0) + 1
+        indices = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        if len(values):
+            values /= np.sqrt(np.dot(values, values))
+        logits = (self.coef[:, indices] @ values + self.intercept)[np.newaxis, :]
+        labels, confidences = self._decide(logits, np.array([STRESS_PATTERN.search(text) is not None]))
+        return labels[0], confidences[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('command', choices=['train'])
+    parser.add_argument('--seed', default=DEFAULT_SEED_PATH, help='TSV of label<TAB>text')
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH, help='where to write the model')
+    args = parser.parse_args()
+
+    from sklearn.model_selection import StratifiedKFold, cross_val_score
+    from sklearn.linear_model import LogisticRegression
+    labels, texts = load_seed(args.seed)
+    scores = cross_val_score(LogisticRegression(C=10.0, max_iter=1000),
+                             make_vectorizer().transform(texts), labels, cv=5)
+    print(f"{len(texts)} examples, 5-fold accuracy {scores.mean():.1%} (+/- {scores.std():.1%})")
+
+    # Held-out predictions, for choosing SENTIMENT_PREFILTER_CONFIDENCE
+    gold, predicted, confidence = [], [], []
+    for train, test in StratifiedKFold(n_splits=5, shuffle=True, random_state=0).split(texts, labels):
+        model = SentimentModel.train([labels[i] for i in train], [texts[i] for i in train])
+        fold_labels, fold_confidence = model.predict_batch([texts[i] for i in test])
+        gold += [labels[i] for i in test]
+        predicted += fold_labels
+        confidence += fold_confidence
+    gold, predicted, confidence = np.array(gold), np.array(predicted), np.array(confidence)
+    print("Pre-filter threshold: share of messages skipping Gemini, held-out precision")
+    for threshold in (0.6, 0.7, 0.75, 0.8, 0.85, 0.9):
+        kept = confidence >= threshold
+        precision = (predicted[kept] == gold[kept]).mean() if kept.any() else float('nan')
+        print(f"  {threshold:.2f}  {kept.mean():6.1%}  {precision:6.1%}")
+
+    SentimentModel.train(labels, texts).save(args.output)
+    print(f"Saved {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+if __name__ == '__main__':
+    sys.exit(main())
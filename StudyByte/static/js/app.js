@@ -13,9 +13,20 @@ const AppState = {
     isProcessing: false,
     animationQueue: [],
     particles: [],
-    selectedPDFFile: null // Store the selected PDF file
+    selectedPDFFile: null, // Store the selected PDF file
+    chatSessionId: getChatSessionId() // Lets the server remember this conversation
 };
 
+// One id per browser tab, kept across reloads
+function getChatSessionId() {
+    let sessionId = sessionStorage.getItem('chatSessionId');
+    if (!sessionId) {
+        sessionId = crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        sessionStorage.setItem('chatSessionId', sessionId);
+    }
+    return sessionId;
+}
+
 // Navigation state management
 function updateNavigation(activeSection) {
     // Remove active class from all nav links
@@ -269,35 +280,48 @@ async function sendMessage() {
     // Show typing indicator
     const typingIndicator = addTypingIndicator();
     
+    let botMessage = null;
+    
     try {
-        // Send to backend with enhanced error handling
-        const response = await fetch('/api/chat', {
+        // Stream the reply token by token as the server generates it
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ message: message })
+            body: JSON.stringify({ message: message, session_id: AppState.chatSessionId })
         });
         
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
             throw new Error(`Server error: ${response.status}`);
         }
         
-        const data = await response.json();
-        
-        // Remove typing indicator
-        removeTypingIndicator(typingIndicator);
+        await readEventStream(response, (event, data) => {
+            if (event === 'token') {
+                if (!botMessage) {
+                    // First token: swap the typing indicator for the reply bubble
+                    removeTypingIndicator(typingIndicator);
+                    botMessage = addChatMessage('bot', '', true);
+                }
+                appendToChatMessage(botMessage, data.text);
+            } else if (event === 'sentiment') {
+                // Trailing event carries the complete reply and its sentiment
+                setChatMessageText(botMessage, data.response);
+                botMessage.dataset.sentiment = data.sentiment;
+                playNotificationSound();
+            }
+        });
         
-        // Add bot response with delay for natural feel
-        setTimeout(() => {
-            addChatMessage('bot', data.response, true);
-            playNotificationSound();
-        }, 500);
+        if (!botMessage) {
+            throw new Error('Empty response stream');
+        }
         
     } catch (error) {
         console.error('Chat error:', error);
         removeTypingIndicator(typingIndicator);
-        addChatMessage('bot', 'I apologize, but I\'m having trouble processing your message right now. Please try again in a moment. 💙', true);
+        if (!botMessage) {
+            addChatMessage('bot', 'I apologize, but I\'m having trouble processing your message right now. Please try again in a moment. 💙', true);
+        }
     } finally {
         input.disabled = false;
         input.focus();
@@ -330,7 +354,7 @@ function addChatMessage(sender, content, animate = true) {
                 <i class="fas fa-leaf text-success"></i>
             </div>
             <div class="message-content">
-                <strong>🌿 AI Companion:</strong> ${escapeHtml(content)}
+                <strong>🌿 AI Companion:</strong> <span class="message-text">${escapeHtml(content)}</span>
                 <div class="message-time">${timestamp}</div>
             </div>
         `;
@@ -353,6 +377,50 @@ function addChatMessage(sender, content, animate = true) {
     return messageDiv;
 }
 
+// Streaming helpers: grow a bot message in place as tokens arrive
+function appendToChatMessage(messageDiv, text) {
+    const textSpan = messageDiv.querySelector('.message-text');
+    textSpan.textContent += text;
+    
+    const messagesContainer = document.getElementById('chat-messages');
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    
+    const stored = AppState.chatMessages[AppState.chatMessages.length - 1];
+    if (stored && stored.sender === 'bot') stored.content = textSpan.textContent;
+}
+
+function setChatMessageText(messageDiv, text) {
+    messageDiv.querySelector('.message-text').textContent = '';
+    appendToChatMessage(messageDiv, text);
+}
+
+// Parse a Server-Sent Events response body, calling onEvent(event, data) per message
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            let data = '';
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 // Typing indicator for natural conversation flow
 function addTypingIndicator() {
     const messagesContainer = document.getElementById('chat-messages');
@@ -618,17 +686,7 @@ async function processVideo() {
         
         showNotification('Processing video... This may take several minutes.', 'info');
         
-        const response = await fetch('/api/process-video', {
-            method: 'POST',
-            body: formData
-        });
-        
-        if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.error || `Server error: ${response.status}`);
-        }
-        
-        const data = await response.json();
+        const data = await runUploadJob('/api/process-video', formData);
         
         if (data.error) {
             throw new Error(data.error);
@@ -824,21 +882,8 @@ async function processPDF() {
     console.log('📄 File being uploaded:', selectedFile.name, 'Size:', selectedFile.size);
     
     try {
-        console.log('🌐 Making API call to /api/process-pdf');
-        const response = await fetch('/api/process-pdf', {
-            method: 'POST',
-            body: formData
-        });
-        console.log('📥 Response received:', response.status, response.ok);
-        
-        if (!response.ok) {
-            const errorText = await response.text();
-            console.log('❌ Error response:', errorText);
-            throw new Error(`Server error: ${response.status}`);
-        }
-        
-        console.log('✅ Response OK, parsing JSON');
-        const data = await response.json();
+        console.log('🌐 Submitting job to /api/process-pdf');
+        const data = await runUploadJob('/api/process-pdf', formData);
         console.log('📊 Response data:', data);
         
         hideLoadingOverlay();
@@ -1219,6 +1264,32 @@ function preloadAnimations() {
     });
 }
 
+// Submit an upload as a background job and poll until it finishes
+async function runUploadJob(url, formData) {
+    const response = await fetch(`${url}?async=1`, {
+        method: 'POST',
+        body: formData
+    });
+    const job = await response.json();
+    
+    if (!response.ok) {
+        throw new Error(job.error || `Server error: ${response.status}`);
+    }
+    
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const statusResponse = await fetch(job.status_url);
+        const status = await statusResponse.json();
+        
+        if (!statusResponse.ok || status.status === 'failed') {
+            throw new Error(status.error || `Server error: ${statusResponse.status}`);
+        }
+        if (status.status === 'done') {
+            return status.result;
+        }
+    }
+}
+
 // Utility function to escape HTML
 function escapeHtml(text) {
     if (!text || typeof text !== 'string') {
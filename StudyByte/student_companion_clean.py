@@ -3,43 +3,510 @@ AI-Powered Student Companion - Clean Version
 A comprehensive Flask web application for student support
 """
 
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Blueprint, Flask, Request, Response, current_app, g, request, jsonify, render_template, send_from_directory, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
+import json
 import random
 import re
+import time
+import uuid
+import zlib
+import hashlib
+import tempfile
+import heapq
+import shutil
+import zipfile
+import sqlite3
+import threading
+import multiprocessing
 from datetime import datetime
-from collections import Counter
+from collections import Counter, OrderedDict, deque
+from operator import itemgetter
+from functools import cached_property, lru_cache
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.utils import secure_filename
 
 # AI/ML Libraries
-from textblob import TextBlob
-import PyPDF2
-import nltk
+import numpy as np
 
 # Gemini AI Integration
-from config import ai_config
+from config import ResponseCache, ai_config
+from pdf_extraction import iter_pages_parallel
+from transcription import Transcriber
+from sentiment_model import STRESS_PATTERN
+from search_index import SearchIndex
+from metrics import log, metrics
 
-# Download required NLTK data on first run
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
+# ==================== LAZY IMPORTS ====================
+# TextBlob, NLTK, PyPDF2 and scikit-learn are imported on first use so that starting a
+# worker (or a test) stays cheap; warm_up() loads them ahead of time.
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)
+@lru_cache(maxsize=None)
+def load_nltk():
+    """NLTK reading data from the local directory first; nothing is downloaded"""
+    import nltk
+    if ai_config.nltk_data_dir not in nltk.data.path:
+        nltk.data.path.insert(0, ai_config.nltk_data_dir)
+    return nltk
+
+@lru_cache(maxsize=None)
+def load_textblob():
+    load_nltk()
+    from textblob import TextBlob
+    return TextBlob
+
+@lru_cache(maxsize=None)
+def load_pypdf2():
+    import PyPDF2
+    return PyPDF2
+
+@lru_cache(maxsize=None)
+def load_sentiment_model():
+    """Local sentiment model, or None when the weights or scikit-learn are missing"""
+    try:
+        from sentiment_model import SentimentModel
+        return SentimentModel.load(ai_config.sentiment_model_path)
+    except Exception as e:
+        log.warning('sentiment_model_unavailable', error=str(e), fallback='textblob')
+        return None
+
+# Routes live on a blueprint; create_app() builds the Flask app
+bp = Blueprint('studybyte', __name__)
 
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 200 * 1024 * 1024  # 200MB max file size for videos
+MAX_CONTENT_LENGTH = 200 * 1024 * 1024  # 200MB max file size for videos
+
+# ==================== UPLOADS ====================
+MEDIA_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mp3', '.wav', '.m4a', '.webm', '.mkv'}
+
+class UploadFile:
+    """Uniquely named file in UPLOAD_FOLDER that an upload is streamed into
+    
+    The multipart parser writes the body here chunk by chunk, so the file
+    is hashed and size-checked on the fly and never copied afterwards.
+    """
+    def __init__(self, folder, filename, max_bytes):
+        safe_name = secure_filename(filename or '') or os.path.splitext(filename or '')[1].lower()
+        self._file = tempfile.NamedTemporaryFile(dir=folder, prefix='upload_', suffix=f"_{safe_name}", delete=False)
+        self.path = self._file.name
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.claimed = False
+        self._hash = hashlib.sha256()
+    
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise RequestEntityTooLarge(f"File exceeds the {self.max_bytes // (1024 * 1024)}MB limit for this type")
+        self._hash.update(data)
+        return self._file.write(data)
+    
+    def __getattr__(self, name):
+        # read/seek/readline etc. go to the underlying temp file
+        return getattr(self._file, name)
+    
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+    
+    def claim(self):
+        """Take ownership of the file on disk; it is no longer removed with the request"""
+        self._file.close()
+        self.claimed = True
+        return self.path
+    
+    def discard(self):
+        self._file.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+class UploadRequest(Request):
+    """Request that streams file parts straight into UploadFile objects"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.uploads = []
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        extension = os.path.splitext(filename or '')[1].lower()
+        if extension == '.pdf':
+            max_mb = ai_config.upload_max_mb_pdf
+        elif extension in MEDIA_EXTENSIONS:
+            max_mb = ai_config.upload_max_mb_media
+        elif extension == '.zip':
+            max_mb = ai_config.upload_max_mb_archive
+        else:
+            max_mb = ai_config.upload_max_mb_other
+        
+        upload = UploadFile(current_app.config['UPLOAD_FOLDER'], filename, max_mb * 1024 * 1024)
+        self.uploads.append(upload)
+        if content_length and content_length > upload.max_bytes:
+            raise RequestEntityTooLarge(f"File exceeds the {max_mb}MB limit for this type")
+        return upload
+
+@bp.before_app_request
+def parse_uploads():
+    """Parse multipart bodies before the view, so limit errors become 413s"""
+    if request.mimetype == 'multipart/form-data':
+        request.files
+
+@bp.app_errorhandler(RequestEntityTooLarge)
+def upload_too_large(error):
+    return jsonify({'error': error.description}), 413
+
+@bp.teardown_app_request
+def discard_uploads(exc):
+    for upload in getattr(request, 'uploads', []):
+        metrics.inc('upload_bytes_total', upload.size)
+        if not upload.claimed:
+            upload.discard()
+
+# ==================== INSTRUMENTATION ====================
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    started = g.pop('request_started', None)
+    if started is not None:  # None when an earlier before-request hook aborted
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                        route=route, method=request.method)
+    metrics.inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+    return response
+
+# ==================== PROMPTS ====================
+class PromptBuilder:
+    """Gemini prompts for one feature, held to its input token budget
+    
+    The feature's system prompt is sent as the model's system instruction
+    (see AIConfig.model_for), so each call builds and sends only the user
+    turn. build() fills a template and trims the one field that can be
+    arbitrarily long, keeping its beginning and end, so the request with
+    its system instruction stays within the budget.
+    """
+    TRIM_MARKER = '\n[...]\n'
+    
+    def __init__(self, feature, system_instruction=None, budget=None):
+        self.feature = feature
+        self.system_instruction = system_instruction
+        self.budget = ai_config.prompt_token_budgets.get(feature, 0) if budget is None else budget
+        self.instruction_tokens = ai_config.estimate_tokens(system_instruction) if system_instruction else 0
+    
+    def fit(self, text, max_tokens):
+        """text, or its beginning and end if it is estimated at more than max_tokens"""
+        max_chars = max(0, (max_tokens - 1) * 4)  # Inverse of estimate_tokens
+        if len(text) <= max_chars:
+            return text
+        metrics.inc('prompt_trimmed_total', feature=self.feature)
+        keep = max(0, max_chars - len(self.TRIM_MARKER))
+        head = keep * 2 // 3
+        return text[:head] + self.TRIM_MARKER + text[len(text) - (keep - head):]
+    
+    def build(self, template, trim, **fields):
+        """template.format(**fields), with fields[trim] cut to what the budget leaves"""
+        if self.budget:
+            fixed = ai_config.estimate_tokens(template.format(**dict(fields, **{trim: ''})))
+            fields[trim] = self.fit(fields[trim], self.budget - self.instruction_tokens - fixed)
+        return template.format(**fields)
+    
+    def generate(self, prompt, generation_config=None):
+        return ai_config.generate_text(prompt, generation_config, self.feature, self.system_instruction)
+    
+    def stream(self, prompt, generation_config=None):
+        return ai_config.stream_text(prompt, generation_config, self.feature, self.system_instruction)
+
+# ==================== HEDGING ====================
+class Hedger:
+    """Races a Gemini-backed call against the local engine under a latency SLO
+    
+    run() hands remote to its own pool (remote may use the shared executor
+    itself) and computes local on the calling thread in the meantime.
+    Remote's result is used if it is ready within the SLO and is_success
+    accepts it (default: truthy); otherwise local's. A remote call that misses keeps
+    running and its Gemini responses land in the response cache, so the
+    next identical request is answered by Gemini at once. With every
+    worker held by a slow call, further requests go straight to local
+    rather than queueing behind them.
+    """
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hedge')
+        self._slots = threading.BoundedSemaphore(workers)
+    
+    def run(self, feature, remote, local, slo=None, is_success=bool):
+        """(remote's result, True) or (local's result, False)
+        
+        Without an slo (or without Gemini) remote runs on the calling
+        thread and local only if is_success rejects its result.
+        """
+        if not slo or not ai_config.is_gemini_available():
+            result = remote()
+            return (result, True) if is_success(result) else (local(), False)
+        
+        if not self._slots.acquire(blocking=False):
+            metrics.inc('hedge_requests_total', feature=feature, outcome='saturated')
+            return local(), False
+        deadline = time.monotonic() + slo
+        missed = threading.Event()
+        future = self.executor.submit(remote)
+        future.add_done_callback(lambda done: self._finish(feature, done, missed, is_success))
+        fallback = local()
+        
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            missed.set()
+            metrics.inc('hedge_requests_total', feature=feature, outcome='slo_missed')
+            return fallback, False
+        except Exception as e:
+            log.warning('hedge_remote_failed', feature=feature, error=str(e))
+            result = None
+        
+        if result is None or not is_success(result):
+            metrics.inc('hedge_requests_total', feature=feature, outcome='remote_failed')
+            return fallback, False
+        metrics.inc('hedge_requests_total', feature=feature, outcome='remote')
+        return result, True
+    
+    def _finish(self, feature, future, missed, is_success):
+        self._slots.release()
+        if missed.is_set() and future.exception() is None and is_success(future.result()):
+            metrics.inc('hedge_late_results_total', feature=feature)
 
 # ==================== MENTAL HEALTH CHATBOT ====================
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+class SentimentBatcher:
+    """Micro-batches sentiment requests from concurrent chats
+    
+    submit() queues a message and returns a Future. A dispatcher thread
+    closes a batch when the window has passed since its first message or
+    max_batch messages are waiting, then hands it to a small pool so one
+    slow Gemini call does not hold up the next batch. Each result is
+    resolved individually; classify_batch returns None for items it could
+    not label, and those go through fallback instead.
+    """
+    def __init__(self, classify_batch, fallback, window_seconds=0.02, max_batch=16, workers=4):
+        self.classify_batch = classify_batch
+        self.fallback = fallback
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.workers = workers
+        self._pending = []
+        self._condition = threading.Condition()
+        self._pid = None
+        self._pool = None
+        self.batches = 0
+        self.items = 0
+    
+    def _ensure_started(self):
+        # Threads do not survive fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._pending = []
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sentiment-batch')
+        threading.Thread(target=self._dispatch, name='sentiment-dispatcher', daemon=True).start()
+    
+    def submit(self, message):
+        future = Future()
+        with self._condition:
+            self._ensure_started()
+            self._pending.append((message, future))
+            self._condition.notify()
+        return future
+    
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = time.monotonic() + self.window_seconds
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            try:
+                self._pool.submit(self._run_batch, batch)
+            except RuntimeError:
+                # Interpreter shutting down; callers fall back on CancelledError
+                for _, future in batch:
+                    future.cancel()
+                return
+    
+    def _run_batch(self, batch):
+        messages = [message for message, _ in batch]
+        try:
+            labels = self.classify_batch(messages)
+        except Exception as e:
+            log.warning('gemini_error', feature='sentiment_batch', error=str(e))
+            labels = [None] * len(batch)
+        with self._condition:
+            self.batches += 1
+            self.items += len(batch)
+        for (message, future), label in zip(batch, labels):
+            if label is None:
+                metrics.inc('fallback_activations_total', feature='sentiment')
+                try:
+                    label = self.fallback(message)
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+            future.set_result(label)
+    
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0
+        }
+
+class Conversation:
+    """One session: a ring buffer of recent turns plus a rolling digest of older ones"""
+    __slots__ = ('turns', 'digest', 'last_seen', 'size')
+    
+    def __init__(self, max_turns):
+        self.turns = deque(maxlen=max_turns)  # (student message, reply) pairs
+        self.digest = deque()  # Condensed student messages from turns that left the buffer
+        self.last_seen = time.time()
+        self.size = 0
+
+class ConversationStore:
+    """Bounded per-session chat memory
+    
+    Each session keeps its last max_turns exchanges verbatim. A turn that
+    falls out of the buffer is folded into the digest as its first student
+    sentence, so older context costs a few tokens instead of being resent.
+    Sessions are kept in LRU order and evicted when idle for longer than
+    ttl, when there are more than max_sessions, or when the estimated size
+    of all stored text exceeds max_bytes.
+    """
+    # Approximate CPython object overheads in bytes, measured with tracemalloc
+    SESSION_OVERHEAD = 1000  # Conversation, its two deques and the dict entry
+    STRING_OVERHEAD = 50
+    TURN_OVERHEAD = 2 * STRING_OVERHEAD + 56  # Two strings and a tuple
+    DIGEST_CHARS = 160
+    
+    def __init__(self, max_turns=6, context_tokens=600, digest_tokens=150,
+                 max_sessions=10000, max_bytes=64 * 1024 * 1024, ttl=3600):
+        self.max_turns = max_turns
+        self.context_tokens = context_tokens
+        self.digest_tokens = digest_tokens
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+    
+    @staticmethod
+    def _condense(message):
+        first_sentence = re.split(r'(?<=[.!?])\s', message.strip(), maxsplit=1)[0]
+        return first_sentence[:ConversationStore.DIGEST_CHARS]
+    
+    def context(self, session_id):
+        """Prompt text for the session within the token budget ('' if none)"""
+        if not session_id:
+            return ''
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                return ''
+            self._sessions.move_to_end(session_id)
+            conversation.last_seen = time.time()
+            turns = list(conversation.turns)
+            digest = list(conversation.digest)
+        
+        # Newest turns first until the budget runs out
+        budget = self.context_tokens
+        lines = []
+        for message, reply in reversed(turns):
+            turn = f"Student: {message}\nYou: {reply}"
+            cost = ai_config.estimate_tokens(turn)
+            if cost > budget:
+                break
+            lines.append(turn)
+            budget -= cost
+        lines.reverse()
+        
+        if digest and len(lines) == len(turns):
+            earlier = "Earlier the student mentioned: " + '; '.join(digest)
+            if ai_config.estimate_tokens(earlier) <= budget:
+                lines.insert(0, earlier)
+        return '\n'.join(lines)
+    
+    def add_turn(self, session_id, message, reply):
+        if not session_id:
+            return
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                conversation = self._sessions[session_id] = Conversation(self.max_turns)
+                conversation.size = self.SESSION_OVERHEAD + len(session_id)
+                self._bytes += conversation.size
+            self._sessions.move_to_end(session_id)
+            conversation.last_seen = time.time()
+            
+            if len(conversation.turns) == conversation.turns.maxlen:
+                oldest_message, oldest_reply = conversation.turns[0]
+                condensed = self._condense(oldest_message)
+                conversation.digest.append(condensed)
+                added = (len(condensed) + self.STRING_OVERHEAD
+                         - len(oldest_message) - len(oldest_reply) - self.TURN_OVERHEAD)
+                while sum(map(len, conversation.digest)) // 4 > self.digest_tokens:
+                    added -= len(conversation.digest.popleft()) + self.STRING_OVERHEAD
+                conversation.size += added
+                self._bytes += added
+            conversation.turns.append((message, reply))
+            added = len(message) + len(reply) + self.TURN_OVERHEAD
+            conversation.size += added
+            self._bytes += added
+            self._evict()
+    
+    def _evict(self):
+        cutoff = time.time() - self.ttl
+        while self._sessions:
+            session_id, oldest = next(iter(self._sessions.items()))
+            if (oldest.last_seen >= cutoff and len(self._sessions) <= self.max_sessions
+                    and self._bytes <= self.max_bytes):
+                break
+            del self._sessions[session_id]
+            self._bytes -= oldest.size
+            self.evictions += 1
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'size_bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions
+            }
+
 class MentalHealthBot:
+    CHAT_TEMPLATE = '{conversation}Student says: "{message}"\n\n{instructions}'
+    CHAT_INSTRUCTIONS = 'Respond as a supportive companion:'
+    COMBINED_INSTRUCTIONS = """Respond as a supportive companion. Return a JSON object with exactly two keys:
+"reply": your response to the student
+"sentiment": exactly one of positive, negative, or neutral"""
+    
+    SENTIMENT_INSTRUCTION = ("You classify the sentiment of messages written by students. "
+                             "Every label is exactly one of: positive, negative, neutral.")
+    SENTIMENT_TEMPLATE = """Message: "{message}"
+
+Respond with exactly one of these words: positive, negative, or neutral"""
+    
     def __init__(self):
         # Fallback responses for when Gemini is unavailable
         self.fallback_responses = {
@@ -66,37 +533,62 @@ FOCUS AREAS:
 - General emotional support
 
 IMPORTANT: Give practical, actionable advice when appropriate. Never diagnose or provide medical advice."""
+        
+        self.chat_prompts = PromptBuilder('chat', self.system_prompt)
+        self.sentiment_prompts = PromptBuilder('sentiment', self.SENTIMENT_INSTRUCTION)
+        
+        self.sentiment_batcher = SentimentBatcher(
+            self.classify_sentiment_batch,
+            self.analyze_sentiment_local,
+            window_seconds=ai_config.sentiment_batch_window_ms / 1000,
+            max_batch=ai_config.sentiment_batch_size,
+            workers=ai_config.sentiment_batch_workers
+        )
+        
+        self.conversations = ConversationStore(
+            max_turns=ai_config.chat_history_turns,
+            context_tokens=ai_config.chat_context_tokens,
+            digest_tokens=ai_config.chat_digest_tokens,
+            max_sessions=ai_config.chat_max_sessions,
+            max_bytes=ai_config.chat_memory_max_mb * 1024 * 1024,
+            ttl=ai_config.chat_session_ttl
+        )
+
+    def build_chat_prompt(self, message, context='', instructions=CHAT_INSTRUCTIONS):
+        """User turn of a chat request: the conversation so far, if any, and the message"""
+        conversation = f"CONVERSATION SO FAR:\n{context}\n\n" if context else ''
+        return self.chat_prompts.build(self.CHAT_TEMPLATE, 'message', conversation=conversation,
+                                       message=message, instructions=instructions)
 
-    def get_gemini_response(self, message):
+    def get_gemini_response(self, message, context=''):
         """Get response from Gemini AI"""
         try:
             if not ai_config.is_gemini_available():
                 return None
                 
             # Prepare the prompt
-            full_prompt = f"{self.system_prompt}\n\nStudent says: \"{message}\"\n\nRespond as a supportive companion:"
+            prompt = self.build_chat_prompt(message, context)
             
             # Generate response
-            response = ai_config.gemini_model.generate_content(
-                full_prompt,
+            response_text = self.chat_prompts.generate(
+                prompt,
                 generation_config=ai_config.get_generation_config()
             )
             
-            return response.text.strip()
+            return response_text.strip()
             
         except Exception as e:
-            print(f"Gemini API error: {e}")
+            log.warning('gemini_error', feature='chat', error=str(e))
             return None
 
     def analyze_sentiment_textblob(self, text):
         """Fallback sentiment analysis using TextBlob"""
         try:
-            blob = TextBlob(text)
+            blob = load_textblob()(text)
             polarity = blob.sentiment.polarity
             
             # Keyword-based adjustments
-            stress_keywords = ['stress', 'anxious', 'worried', 'overwhelmed', 'panic']
-            if any(keyword in text.lower() for keyword in stress_keywords):
+            if STRESS_PATTERN.search(text):
                 polarity -= 0.3
             
             if polarity > 0.1:
@@ -108,47 +600,159 @@ IMPORTANT: Give practical, actionable advice when appropriate. Never diagnose or
         except:
             return 'neutral'
 
+    def analyze_sentiment_local(self, text):
+        """Sentiment from the local model, or TextBlob if it is not available"""
+        model = load_sentiment_model()
+        if model is None:
+            return self.analyze_sentiment_textblob(text)
+        return model.predict(text)[0]
+
+    BATCH_SENTIMENT_CONFIG = {'temperature': 0.1, 'response_mime_type': 'application/json'}
+
+    def classify_sentiment_batch(self, messages):
+        """Label several messages with one structured Gemini call
+        
+        Each message is cached on its own, so repeats skip the batch.
+        Returns one label per message, None where Gemini gave none.
+        """
+        keys = [ResponseCache.make_key(ai_config.model_name, message, self.BATCH_SENTIMENT_CONFIG,
+                                       self.SENTIMENT_INSTRUCTION) for message in messages]
+        labels = [ai_config.response_cache.get(key, 'sentiment') for key in keys]
+        missing = [i for i, label in enumerate(labels) if label is None]
+        if not missing:
+            return labels
+        
+        # The budget applies to each message, so a batch costs what its calls would have
+        prompts = self.sentiment_prompts
+        room = prompts.budget - prompts.instruction_tokens
+        texts = [prompts.fit(messages[i], room) if prompts.budget else messages[i] for i in missing]
+        numbered = '\n'.join(f'{n}. {json.dumps(text)}' for n, text in enumerate(texts, 1))
+        prompt = f"""Messages:
+{numbered}
+
+Return a JSON object with one key, "sentiments": an array with exactly one entry per message, in order,
+each exactly one of positive, negative, or neutral"""
+        
+        response_text = self.sentiment_prompts.generate(
+            prompt,
+            generation_config=self.BATCH_SENTIMENT_CONFIG
+        )
+        results = json.loads(response_text).get('sentiments', [])
+        for i, label in zip(missing, results):
+            label = str(label).strip().lower()
+            if label in SENTIMENTS:
+                labels[i] = label
+                ai_config.response_cache.set(keys[i], label, 'sentiment')
+        return labels
+
     def get_sentiment_from_gemini(self, message):
         """Get sentiment analysis from Gemini"""
         try:
             if not ai_config.is_gemini_available():
-                return self.analyze_sentiment_textblob(message)
+                metrics.inc('fallback_activations_total', feature='sentiment')
+                return self.analyze_sentiment_local(message)
+            
+            # Skip the Gemini call when the local model is confident enough
+            model = load_sentiment_model() if ai_config.sentiment_prefilter_confidence > 0 else None
+            if model is not None:
+                label, confidence = model.predict(message)
+                if confidence >= ai_config.sentiment_prefilter_confidence:
+                    metrics.inc('sentiment_prefilter_hits_total')
+                    return label
+            
+            if self.sentiment_batcher.max_batch > 1:
+                return self.sentiment_batcher.submit(message).result(timeout=ai_config.gemini_client.timeout * 2)
                 
-            prompt = f"""Analyze the sentiment of this student message and respond with ONLY one word:
-
-Message: "{message}"
-
-Respond with exactly one of these words: positive, negative, or neutral"""
+            prompt = self.sentiment_prompts.build(self.SENTIMENT_TEMPLATE, 'message', message=message)
             
-            response = ai_config.gemini_model.generate_content(
+            response_text = self.sentiment_prompts.generate(
                 prompt,
                 generation_config={'temperature': 0.1, 'max_output_tokens': 10}
             )
             
-            sentiment = response.text.strip().lower()
-            return sentiment if sentiment in ['positive', 'negative', 'neutral'] else 'neutral'
+            sentiment = response_text.strip().lower()
+            return sentiment if sentiment in SENTIMENTS else 'neutral'
+            
+        except Exception as e:
+            log.warning('gemini_error', feature='sentiment', error=str(e))
+            metrics.inc('fallback_activations_total', feature='sentiment')
+            return self.analyze_sentiment_local(message)
+
+    def get_combined_response(self, message, context=''):
+        """Get reply and sentiment from a single structured Gemini call"""
+        try:
+            if not ai_config.is_gemini_available():
+                return None, None
+                
+            prompt = self.build_chat_prompt(message, context, self.COMBINED_INSTRUCTIONS)
+            
+            generation_config = dict(ai_config.get_generation_config(),
+                                     response_mime_type='application/json')
+            response_text = self.chat_prompts.generate(
+                prompt,
+                generation_config=generation_config
+            )
+            
+            data = json.loads(response_text)
+            reply = str(data.get('reply', '')).strip()
+            sentiment = str(data.get('sentiment', '')).strip().lower()
+            if not reply or sentiment not in SENTIMENTS:
+                raise ValueError(f"Malformed structured response: {response_text[:100]}")
+            
+            return reply, sentiment
             
         except Exception as e:
-            print(f"Gemini sentiment error: {e}")
-            return self.analyze_sentiment_textblob(message)
+            log.warning('gemini_error', feature='chat_combined', error=str(e))
+            return None, None
 
-    def process_message(self, message):
-        """Process user message with Gemini AI or fallback"""
-        # Get AI response
-        ai_response = self.get_gemini_response(message)
+    def get_ai_reply(self, message, context=''):
+        """Reply and sentiment from Gemini in the configured CHAT_MODE; reply is None on failure"""
+        if ai_config.chat_mode == 'combined':
+            # One round trip for both reply and sentiment
+            ai_response, sentiment = self.get_combined_response(message, context)
+            if sentiment is None:
+                metrics.inc('fallback_activations_total', feature='sentiment')
+                sentiment = self.analyze_sentiment_local(message)
+        elif ai_config.chat_mode == 'concurrent':
+            # Two round trips in parallel on the shared executor
+            response_future = ai_config.executor.submit(self.get_gemini_response, message, context)
+            sentiment_future = ai_config.executor.submit(self.get_sentiment_from_gemini, message)
+            ai_response = response_future.result()
+            sentiment = sentiment_future.result()
+        else:
+            # Get AI response
+            ai_response = self.get_gemini_response(message, context)
+            
+            # Get sentiment
+            sentiment = self.get_sentiment_from_gemini(message)
+        return ai_response, sentiment
+
+    def process_message(self, message, session_id=None, slo=None):
+        """Process user message with Gemini AI or fallback
         
-        # Get sentiment
-        sentiment = self.get_sentiment_from_gemini(message)
+        With an slo (seconds), the local reply is sent if Gemini has not
+        answered by then (see Hedger).
+        """
+        context = self.conversations.context(session_id)
+        (ai_response, sentiment), _ = hedger.run(
+            'chat',
+            lambda: self.get_ai_reply(message, context),
+            lambda: (None, self.analyze_sentiment_local(message)),
+            slo,
+            is_success=lambda reply: bool(reply[0])  # Sentiment alone is not a Gemini reply
+        )
         
         if ai_response:
             response_text = ai_response
             ai_powered = True
         else:
             # Fallback to simple response
+            metrics.inc('fallback_activations_total', feature='chat')
             response_text = self.fallback_responses.get(sentiment, 
                 "I'm here to support you. How are you feeling today?")
             ai_powered = False
         
+        self.conversations.add_turn(session_id, message, response_text)
         return {
             'response': response_text,
             'sentiment': sentiment,
@@ -156,9 +760,216 @@ Respond with exactly one of these words: positive, negative, or neutral"""
             'timestamp': datetime.now().strftime('%H:%M')
         }
 
+    def stream_message(self, message, session_id=None):
+        """Yield (event, data) pairs: reply tokens as Gemini produces them,
+        then a trailing sentiment event carrying the complete result
+        
+        Sentiment runs concurrently on the shared executor, so it is usually
+        ready by the time the last token has been sent.
+        """
+        sentiment_future = ai_config.executor.submit(self.get_sentiment_from_gemini, message)
+        context = self.conversations.context(session_id)
+        parts = []
+        if ai_config.is_gemini_available():
+            try:
+                for text in self.chat_prompts.stream(
+                    self.build_chat_prompt(message, context),
+                    generation_config=ai_config.get_generation_config()
+                ):
+                    parts.append(text)
+                    yield 'token', {'text': text}
+            except Exception as e:
+                log.warning('gemini_error', feature='chat_stream', error=str(e))
+        
+        sentiment = sentiment_future.result()
+        response_text = ''.join(parts).strip()
+        ai_powered = bool(response_text)
+        if not ai_powered:
+            metrics.inc('fallback_activations_total', feature='chat')
+            response_text = self.fallback_responses.get(sentiment,
+                "I'm here to support you. How are you feeling today?")
+            yield 'token', {'text': response_text}
+        
+        self.conversations.add_turn(session_id, message, response_text)
+        yield 'sentiment', {
+            'response': response_text,
+            'sentiment': sentiment,
+            'ai_powered': ai_powered,
+            'timestamp': datetime.now().strftime('%H:%M')
+        }
+
+# ==================== TEXT ANALYSIS ====================
+class SpaceSaving:
+    """Approximate top-k counter in fixed memory (Space-Saving)
+    
+    Tracks at most capacity items. When full, a new item replaces one with
+    the smallest count and takes over that count plus one, so a count is
+    overestimated by at most errors[item], and any item seen more than
+    total / capacity times is guaranteed to be tracked. Items are bucketed
+    by count, so each update is O(1). With no more distinct items than
+    capacity it is exact and ranks ties like Counter.most_common.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}  # Insertion order breaks ties, as in Counter
+        self.errors = {}
+        self.total = 0
+        self._buckets = {}  # count -> items with that count, oldest first
+        self._min = 0
+    
+    def _move(self, item, old, new):
+        bucket = self._buckets[old]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[old]
+            if old == self._min:
+                self._min = new
+        self._buckets.setdefault(new, {})[item] = None
+        self.counts[item] = new
+    
+    def add(self, item):
+        self.total += 1
+        count = self.counts.get(item)
+        if count is not None:
+            self._move(item, count, count + 1)
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+            self._buckets.setdefault(1, {})[item] = None
+            self._min = 1
+        else:
+            # Evict the oldest item with the smallest count; the newcomer inherits it
+            minimum = self._min
+            bucket = self._buckets[minimum]
+            victim = next(iter(bucket))
+            del bucket[victim], self.counts[victim], self.errors[victim]
+            self.counts[item] = minimum
+            self.errors[item] = minimum
+            bucket[item] = None
+            self._move(item, minimum, minimum + 1)
+    
+    def update(self, items):
+        for item in items:
+            self.add(item)
+    
+    def most_common(self, n):
+        return heapq.nlargest(n, self.counts.items(), key=itemgetter(1))
+
+def make_concept_counter():
+    """Counter for key concept phrases: exact, or bounded by CONCEPT_CAPACITY"""
+    if ai_config.concept_counting == 'exact':
+        return Counter()
+    return SpaceSaving(ai_config.concept_capacity)
+
+class TextAnalysis:
+    """Single-pass NLP analysis of a text
+    
+    Tokenizes, splits sentences and chunks noun phrases at most once;
+    every derived field is computed lazily and memoized.
+    """
+    def __init__(self, text):
+        self.clean_text = re.sub(r'\s+', ' ', text).strip()
+        self._sentence_phrases = {}
+    
+    @cached_property
+    def blob(self):
+        return load_textblob()(self.clean_text)
+    
+    @cached_property
+    def sentence_blobs(self):
+        return list(self.blob.sentences)
+    
+    @cached_property
+    def sentences(self):
+        return [str(sentence) for sentence in self.sentence_blobs]
+    
+    def phrases_in(self, index):
+        """Filtered, title-cased noun phrases of one sentence"""
+        if index not in self._sentence_phrases:
+            self._sentence_phrases[index] = [phrase.title() for phrase in self.sentence_blobs[index].noun_phrases
+                                             if 3 < len(phrase) < 50 and not phrase.isdigit()]
+        return self._sentence_phrases[index]
+
+class ExtractiveSummarizer:
+    """Linear-time extractive summarizer over a sparse sentence-term matrix
+    
+    Sentences are scored by index (duplicates are kept apart) with the
+    average corpus frequency of their words, optionally IDF-weighted.
+    """
+    PUNCTUATION = '.,;:!?"\'()[]{}'
+    
+    def __init__(self, weighting='tf'):
+        self.weighting = weighting
+    
+    def score_sentences(self, sentences):
+        """Vectorized per-sentence scores"""
+        vocabulary = {}
+        counted, rows, columns, lengths = [], [], [], []
+        for row, sentence in enumerate(sentences):
+            tokens = sentence.lower().split()
+            lengths.append(len(tokens))
+            for token in tokens:
+                # Frequencies count bare words; like the original ranking,
+                # only tokens without attached punctuation earn a score
+                word = token.strip(self.PUNCTUATION)
+                if len(word) > 2:
+                    column = vocabulary.setdefault(word, len(vocabulary))
+                    counted.append(column)
+                    if word == token:
+                        rows.append(row)
+                        columns.append(column)
+        
+        if not vocabulary:
+            return np.zeros(len(sentences))
+        
+        # Sparse matrix in coordinate form: one (row, column) entry per token
+        rows = np.array(rows, dtype=np.int64)
+        columns = np.array(columns, dtype=np.int64)
+        term_freq = np.bincount(np.array(counted, dtype=np.int64), minlength=len(vocabulary)).astype(np.float64)
+        weights = term_freq[columns]
+        
+        if self.weighting == 'tfidf':
+            unique_entries = np.unique(rows * len(vocabulary) + columns)
+            doc_freq = np.bincount(unique_entries % len(vocabulary), minlength=len(vocabulary))
+            idf = np.log((1 + len(sentences)) / (1 + doc_freq)) + 1
+            weights = weights * idf[columns]
+        
+        totals = np.bincount(rows, weights=weights, minlength=len(sentences))
+        return totals / np.maximum(np.array(lengths, dtype=np.float64), 1)
+    
+    def summarize(self, sentences, max_sentences=3):
+        """Top-scoring sentences in their original order"""
+        if len(sentences) <= max_sentences:
+            return list(sentences)
+        scores = self.score_sentences(sentences)
+        top = heapq.nlargest(max_sentences, range(len(sentences)), key=scores.__getitem__)
+        return [sentences[index] for index in sorted(top)]
+
 # ==================== TEXT SUMMARIZER ====================
 class TextSummarizer:
+    SUMMARY_TEMPLATE = """Text to summarize:
+{text}
+
+Please provide:
+1. A concise summary (2-4 sentences)
+2. Key concepts (3-5 bullet points)
+
+Summary:"""
+    CHUNK_TEMPLATE = """This text is one section of a longer document.
+
+Text to summarize:
+{chunk}
+
+Summarize this section in 2-3 sentences, keeping its key terms:"""
+    
     def __init__(self):
+        self.extractive = ExtractiveSummarizer(weighting=ai_config.summary_weighting)
+        self.transcriber = Transcriber(
+            model_name=ai_config.whisper_model,
+            workers=ai_config.transcribe_workers,
+            window_seconds=ai_config.transcribe_window_seconds,
+            threads_per_worker=ai_config.transcribe_threads_per_worker
+        )
         self.system_prompt = """You are an expert text summarizer for students. Your task is to:
 
 📝 SUMMARIZATION RULES:
@@ -169,6 +980,14 @@ class TextSummarizer:
 - Make it study-friendly and easy to understand
 
 Focus on academic content, lectures, articles, or study materials."""
+        self.summary_prompts = PromptBuilder('summary', self.system_prompt)
+        
+        # Texts longer than a chunk are map-reduced; a chunk must fit the budget
+        self.chunk_tokens = ai_config.summary_chunk_tokens
+        if self.summary_prompts.budget:
+            room = (self.summary_prompts.budget - self.summary_prompts.instruction_tokens
+                    - ai_config.estimate_tokens(self.SUMMARY_TEMPLATE))
+            self.chunk_tokens = max(1, min(self.chunk_tokens, room))
 
     def get_gemini_summary(self, text):
         """Get AI-powered summary from Gemini"""
@@ -176,80 +995,123 @@ Focus on academic content, lectures, articles, or study materials."""
             if not ai_config.is_gemini_available():
                 return None
                 
-            prompt = f"""{self.system_prompt}
-
-Text to summarize:
-{text}
+            prompt = self.summary_prompts.build(self.SUMMARY_TEMPLATE, 'text', text=text)
+            
+            response_text = self.summary_prompts.generate(
+                prompt,
+                generation_config=ai_config.get_generation_config()
+            )
+            
+            return response_text.strip()
+            
+        except Exception as e:
+            log.warning('gemini_error', feature='summary', error=str(e))
+            return None
 
-Please provide:
-1. A concise summary (2-4 sentences)
-2. Key concepts (3-5 bullet points)
+    def split_chunks(self, text):
+        """Split text into token-bounded chunks at sentence boundaries
+        
+        Boundaries are content-defined (a chunk may end after a sentence
+        whose hash matches), so editing one part of a document leaves the
+        other chunks, and their cached summaries, unchanged.
+        """
+        max_tokens = self.chunk_tokens
+        min_tokens = max_tokens // 2
+        chunks, current, current_tokens = [], [], 0
+        for sentence in TextAnalysis(text).sentences:
+            sentence_tokens = ai_config.estimate_tokens(sentence)
+            if current and current_tokens + sentence_tokens > max_tokens:
+                chunks.append(' '.join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += sentence_tokens
+            if current_tokens >= min_tokens and zlib.crc32(sentence.encode('utf-8')) % 4 == 0:
+                chunks.append(' '.join(current))
+                current, current_tokens = [], 0
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
 
-Summary:"""
+    def get_gemini_chunk_summary(self, chunk):
+        """Map step: summarize one section of a longer document"""
+        try:
+            prompt = self.summary_prompts.build(self.CHUNK_TEMPLATE, 'chunk', chunk=chunk)
             
-            response = ai_config.gemini_model.generate_content(
+            response_text = self.summary_prompts.generate(
                 prompt,
                 generation_config=ai_config.get_generation_config()
             )
             
-            return response.text.strip()
+            return response_text.strip()
             
         except Exception as e:
-            print(f"Gemini summarization error: {e}")
+            log.warning('gemini_error', feature='summary_chunk', error=str(e))
             return None
 
-    def fallback_summarize(self, text, max_sentences=3):
-        """Fallback summarization using TextBlob"""
-        if not text or len(text.strip()) < 50:
-            return "Text is too short to summarize effectively."
-        
-        # Clean text
-        text = re.sub(r'\s+', ' ', text).strip()
+    def get_map_reduce_summary(self, text):
+        """Summarize chunks concurrently, then combine the partial summaries"""
+        if not ai_config.is_gemini_available():
+            return None
         
-        # Extract sentences
-        blob = TextBlob(text)
-        sentences = [str(sentence).strip() for sentence in blob.sentences if len(str(sentence)) > 10]
+        chunks = self.split_chunks(text)
+        if len(chunks) == 1:
+            return self.get_gemini_summary(chunks[0])
         
-        if len(sentences) <= max_sentences:
-            return ' '.join(sentences)
+        # Bound the number of in-flight chunk calls for this document
+        limiter = threading.BoundedSemaphore(ai_config.summary_concurrency)
+        futures = []
+        for chunk in chunks:
+            limiter.acquire()
+            future = ai_config.executor.submit(self.get_gemini_chunk_summary, chunk)
+            future.add_done_callback(lambda _: limiter.release())
+            futures.append(future)
         
-        # Calculate word frequency for scoring
-        words = [word.lower() for word in blob.words if len(word) > 2]
-        word_freq = Counter(words)
+        partial_summaries = [future.result() for future in futures]
+        if not all(partial_summaries):
+            return None
         
-        # Score sentences
-        sentence_scores = {}
-        for sentence in sentences:
-            words_in_sentence = sentence.lower().split()
-            score = sum(word_freq.get(word, 0) for word in words_in_sentence)
-            sentence_scores[sentence] = score / len(words_in_sentence) if words_in_sentence else 0
+        # Reduce step; partial summaries that are still too long get another round
+        combined = '\n\n'.join(partial_summaries)
+        if ai_config.estimate_tokens(combined) > self.chunk_tokens:
+            return self.get_map_reduce_summary(combined)
+        return self.get_gemini_summary(combined)
+
+    def fallback_summarize(self, text, max_sentences=None):
+        """Fallback extractive summarization"""
+        if not text or len(text.strip()) < 50:
+            return "Text is too short to summarize effectively."
         
-        # Get top sentences
-        top_sentences = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:max_sentences]
-        summary_sentences = [sentence for sentence in sentences if any(sentence == s[0] for s in top_sentences)]
+        max_sentences = max_sentences or ai_config.summary_max_sentences
+        sentences = [sentence.strip() for sentence in TextAnalysis(text).sentences if len(sentence) > 10]
         
-        return ' '.join(summary_sentences)
+        return ' '.join(self.extractive.summarize(sentences, max_sentences))
+
+    def get_ai_summary(self, text):
+        """Gemini summary, in chunks when the text is too long for one call; None on failure"""
+        if ai_config.estimate_tokens(text) > self.chunk_tokens:
+            return self.get_map_reduce_summary(text)
+        return self.get_gemini_summary(text)
 
-    def summarize_text(self, text):
-        """Main summarization method"""
-        # Try Gemini first
-        ai_summary = self.get_gemini_summary(text)
+    def summarize_text(self, text, slo=None):
+        """Main summarization method
         
-        if ai_summary:
-            return {
-                'summary': ai_summary,
-                'ai_powered': True,
-                'original_length': len(text.split()),
-                'summary_length': len(ai_summary.split())
-            }
-        else:
-            summary = self.fallback_summarize(text)
-            return {
-                'summary': summary,
-                'ai_powered': False,
-                'original_length': len(text.split()),
-                'summary_length': len(summary.split())
-            }
+        With an slo (seconds), the extractive summary is returned if Gemini
+        has not answered by then (see Hedger).
+        """
+        summary, ai_powered = hedger.run(
+            'summary',
+            lambda: self.get_ai_summary(text),
+            lambda: self.fallback_summarize(text),
+            slo
+        )
+        if not ai_powered:
+            metrics.inc('fallback_activations_total', feature='summary')
+        return {
+            'summary': summary,
+            'ai_powered': ai_powered,
+            'original_length': len(text.split()),
+            'summary_length': len(summary.split())
+        }
 
     def process_audio_video(self, file_path):
         """Process audio/video files for summarization"""
@@ -270,6 +1132,13 @@ Summary:"""
                     # Determine file type
                     file_type = "audio" if file_extension in audio_extensions else "video"
                     
+                    # Transcribe locally when Whisper and ffmpeg are available
+                    try:
+                        return self.transcribe_media(file_path, file_type, file_size_mb)
+                    except Exception as e:
+                        log.warning('transcription_unavailable', error=str(e))
+                        metrics.inc('fallback_activations_total', feature='transcription')
+                    
                     # For music files, provide music-specific response
                     if file_extension == '.mp3':
                         summary = self.generate_music_analysis(file_path, file_size_mb)
@@ -319,6 +1188,34 @@ Summary:"""
                 'file_path': file_path
             }
     
+    def transcribe_media(self, file_path, file_type, file_size_mb):
+        """Transcribe speech locally and summarize the transcript"""
+        transcript = self.transcriber.transcribe(file_path)
+        text = transcript['text']
+        
+        if len(text) >= 50:
+            result = self.summarize_text(text)
+            summary, ai_powered = result['summary'], result['ai_powered']
+        elif file_type == 'audio':
+            # Little or no speech, e.g. instrumental music
+            summary, ai_powered = self.generate_music_analysis(file_path, file_size_mb), False
+        else:
+            summary, ai_powered = f"No speech was detected in this {file_type} file, so there is nothing to summarize.", False
+        
+        return {
+            'summary': summary,
+            'transcription': text or "No speech detected.",
+            'ai_powered': ai_powered,
+            'file_type': file_type,
+            'duration': self.format_duration(transcript['duration_seconds']),
+            'file_size_mb': round(file_size_mb, 2),
+            'status': 'processed'
+        }
+    
+    def format_duration(self, seconds):
+        minutes, seconds = divmod(int(round(seconds)), 60)
+        return f"{minutes} min {seconds} sec" if minutes else f"{seconds} sec"
+    
     def generate_music_analysis(self, file_path, file_size_mb):
         """Generate analysis for music files"""
         filename = os.path.basename(file_path)
@@ -363,57 +1260,242 @@ The file has been processed successfully and is ready for advanced audio analysi
             return f"~{estimated_minutes} minutes (estimated)"
 
 # ==================== PDF PROCESSOR ====================
+class NotesAccumulator:
+    """Builds smart notes incrementally as page text arrives
+    
+    Sentences that run across a page break are carried over to the next
+    page, so the whole document never has to be held in memory, and
+    concept counts stay bounded too unless CONCEPT_COUNTING=exact.
+    """
+    MAX_CARRY = 2000  # Flush unterminated text beyond this many characters
+    
+    def __init__(self, max_points=5, summary_sentence_count=3):
+        self.max_points = max_points
+        self.summary_sentence_count = summary_sentence_count
+        self.phrase_counts = make_concept_counter()
+        self.key_points = []
+        self.summary_sentences = []
+        self.pages = 0
+        self.raw_characters = 0
+        self.total_characters = 0
+        self._carry = ''
+    
+    def add_page(self, page_text):
+        """Feed one page of raw extracted text"""
+        self.pages += 1
+        self.raw_characters += len(page_text) + 1
+        
+        # Clean whitespace per page
+        clean_page = re.sub(r'\s+', ' ', page_text).strip()
+        if not clean_page:
+            return
+        if self.total_characters:
+            self.total_characters += 1
+        self.total_characters += len(clean_page)
+        
+        analysis = TextAnalysis(f"{self._carry} {clean_page}")
+        self._carry = ''
+        
+        complete = len(analysis.sentences)
+        last = analysis.sentences[-1].rstrip() if complete else ''
+        if last and not last.endswith(('.', '!', '?')) and len(last) < self.MAX_CARRY:
+            self._carry = analysis.sentences[-1]
+            complete -= 1
+        self._add_sentences(analysis, complete)
+    
+    def finish(self):
+        """Flush any text still waiting for a sentence boundary"""
+        if self._carry:
+            analysis = TextAnalysis(self._carry)
+            self._carry = ''
+            self._add_sentences(analysis, len(analysis.sentences))
+    
+    def _add_sentences(self, analysis, count):
+        for index, sentence in enumerate(analysis.sentences[:count]):
+            if len(self.summary_sentences) < self.summary_sentence_count:
+                self.summary_sentences.append(sentence)
+            if len(self.key_points) < self.max_points and 20 < len(sentence) < 200:
+                self.key_points.append(sentence)
+            
+            # Key concepts (noun phrases)
+            self.phrase_counts.update(analysis.phrases_in(index))
+    
+    def key_concepts(self, limit=10):
+        return [phrase for phrase, count in self.phrase_counts.most_common(15) if count > 1][:limit]
+    
+    def result(self):
+        """Final notes in the /api/process-pdf response format"""
+        self.finish()
+        if self.total_characters < 100:
+            return {"error": "PDF contains insufficient text content"}
+        
+        # Generate summary
+        summary = ' '.join(self.summary_sentences)[:300]
+        if len(summary) > 297:
+            summary += "..."
+        
+        key_concepts = self.key_concepts()
+        return {
+            'smart_notes': f"{summary}\n\nKey Points:\n" + '\n'.join([f"• {point}" for point in self.key_points]),
+            'key_terms': key_concepts,
+            'pages': self.pages,
+            'document_info': {
+                'total_characters': self.total_characters,
+                'estimated_pages': self.raw_characters // 2000
+            },
+            'summary': summary,
+            'key_concepts': key_concepts,
+            'definitions': [],  # Simplified for now
+            'key_points': self.key_points
+        }
+
+def iter_text_windows(text, size):
+    """Slices of text of about size characters, cut at whitespace"""
+    start = 0
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            cut = max(text.rfind(' ', start, end), text.rfind('\n', start, end))
+            if cut > start:
+                end = cut
+        yield text[start:end]
+        start = end
+
+def hash_file(path):
+    """SHA-256 of a file, read in 1MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
 class PDFProcessor:
-    def extract_text_from_pdf(self, pdf_path):
+    # Bump when analysis output changes so stale cached results are ignored
+    ANALYZER_VERSION = 2
+    # Pasted text is analyzed in windows of this many characters
+    TEXT_WINDOW_CHARS = 20000
+    
+    def __init__(self, search_index=None):
+        self._process_pool = None
+        self._pool_lock = threading.Lock()
+        self.search_index = search_index
+    
+    def get_process_pool(self):
+        """Lazily start the bounded process pool for large documents
+        
+        Spawned, not forked, like BatchProcessor's pool: a forked copy of
+        the threaded server may inherit locks held by other threads.
+        """
+        with self._pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=ai_config.pdf_workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+            return self._process_pool
+    
+    def _reset_pool(self, pool):
+        """Drop a pool whose worker died (e.g. OOM on a huge PDF) so the next document starts a fresh one"""
+        with self._pool_lock:
+            if self._process_pool is pool:
+                self._process_pool = None
+    
+    def use_parallel(self, total_pages):
+        return ai_config.pdf_workers > 1 and total_pages >= ai_config.pdf_parallel_min_pages
+    
+    def iter_pages(self, pdf_path):
+        """Yield (page_number, total_pages, text) as each page is extracted"""
+        started = time.perf_counter()
+        page_number = 0
         try:
             with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+                pdf_reader = load_pypdf2().PdfReader(file)
+                total_pages = len(pdf_reader.pages)
+                pool = None
+                if self.use_parallel(total_pages):
+                    pool = self.get_process_pool()
+                    pages = iter_pages_parallel(pdf_path, total_pages, pool, ai_config.pdf_workers)
+                else:
+                    pages = (page.extract_text() or '' for page in pdf_reader.pages)
+                try:
+                    for page_number, page_text in enumerate(pages, 1):
+                        yield page_number, total_pages, page_text
+                except BrokenProcessPool:
+                    self._reset_pool(pool)
+                    raise
         except Exception as e:
             raise Exception(f"Error reading PDF: {str(e)}")
+        finally:
+            # Includes the consumer's per-page analysis, so this is end-to-end throughput
+            metrics.inc('pdf_pages_total', page_number)
+            metrics.inc('pdf_processing_seconds_total', time.perf_counter() - started)
+    
+    def extract_text_from_pdf(self, pdf_path):
+        return ''.join(f"{text}\n" for _, _, text in self.iter_pages(pdf_path))
     
     def extract_notes(self, pdf_path):
         try:
-            raw_text = self.extract_text_from_pdf(pdf_path)
-            if not raw_text or len(raw_text.strip()) < 100:
-                return {"error": "PDF contains insufficient text content"}
-            
-            # Clean text
-            clean_text = re.sub(r'\s+', ' ', raw_text).strip()
-            
-            # Extract components
-            blob = TextBlob(clean_text)
-            sentences = [str(s) for s in blob.sentences if 20 < len(str(s)) < 200]
+            notes = NotesAccumulator()
+            for _, _, page_text in self.iter_pages(pdf_path):
+                notes.add_page(page_text)
+            return notes.result()
             
-            # Key concepts (noun phrases)
-            noun_phrases = [phrase.title() for phrase in blob.noun_phrases 
-                          if 3 < len(phrase) < 50 and not phrase.isdigit()]
-            key_concepts = [phrase for phrase, count in Counter(noun_phrases).most_common(15) if count > 1]
-            
-            # Generate summary
-            summary = ' '.join([str(s) for s in blob.sentences[:3]])[:300]
-            if len(summary) > 297:
-                summary += "..."
+        except Exception as e:
+            return {"error": f"Failed to process PDF: {str(e)}"}
+    
+    def index_result(self, kind, content_hash, name, result):
+        """Add finished notes to the search index; indexing problems never fail the request"""
+        if self.search_index is None or 'error' in result:
+            return
+        try:
+            self.search_index.add(content_hash, kind, name or result.get('summary', '')[:80], result)
+        except Exception as e:
+            log.warning('search_index_failed', error=str(e))
+    
+    def notes_cache_key(self, content_hash):
+        return f"pdf:{content_hash}:v{self.ANALYZER_VERSION}"
+    
+    def extract_notes_cached(self, pdf_path, content_hash=None, use_cache=True, name=None):
+        """extract_notes behind the analysis cache; hits skip PDF parsing entirely"""
+        content_hash = content_hash or hash_file(pdf_path)
+        key = self.notes_cache_key(content_hash)
+        cached = ai_config.analysis_cache.get(key) if use_cache else None
+        if cached is not None:
+            self.index_result('pdf', content_hash, name, cached)
+            return cached
+        
+        result = self.extract_notes(pdf_path)
+        if 'error' not in result:
+            ai_config.analysis_cache.set(key, result, source_bytes=os.path.getsize(pdf_path))
+        self.index_result('pdf', content_hash, name, result)
+        return result
+    
+    def stream_notes(self, pdf_path, content_hash=None, use_cache=True, name=None):
+        """Yield progress events per page, then the final notes"""
+        try:
+            content_hash = content_hash or hash_file(pdf_path)
+            key = self.notes_cache_key(content_hash)
+            cached = ai_config.analysis_cache.get(key) if use_cache else None
+            if cached is not None:
+                self.index_result('pdf', content_hash, name, cached)
+                yield dict(cached, event='result')
+                return
             
-            return {
-                'smart_notes': f"{summary}\n\nKey Points:\n" + '\n'.join([f"• {point}" for point in sentences[:5]]),
-                'key_terms': key_concepts[:10],
-                'pages': len(raw_text) // 2000,
-                'document_info': {
-                    'total_characters': len(clean_text),
-                    'estimated_pages': len(raw_text) // 2000
-                },
-                'summary': summary,
-                'key_concepts': key_concepts[:10],
-                'definitions': [],  # Simplified for now
-                'key_points': sentences[:5]
-            }
+            notes = NotesAccumulator()
+            for page_number, total_pages, page_text in self.iter_pages(pdf_path):
+                notes.add_page(page_text)
+                yield {
+                    'event': 'progress',
+                    'page': page_number,
+                    'total_pages': total_pages,
+                    'key_concepts': notes.key_concepts()
+                }
+            result = notes.result()
+            if 'error' not in result:
+                ai_config.analysis_cache.set(key, result, source_bytes=os.path.getsize(pdf_path))
+            self.index_result('pdf', content_hash, name, result)
+            yield dict(result, event='result')
             
         except Exception as e:
-            return {"error": f"Failed to process PDF: {str(e)}"}
+            yield {'event': 'result', 'error': f"Failed to process PDF: {str(e)}"}
     
     def process_text_directly(self, text):
         """Process text directly without PDF extraction"""
@@ -421,21 +1503,18 @@ class PDFProcessor:
             if not text or len(text.strip()) < 50:
                 return {"error": "Text is too short for meaningful analysis"}
             
-            # Clean text
-            clean_text = re.sub(r'\s+', ' ', text).strip()
-            
-            # Extract components using TextBlob
-            blob = TextBlob(clean_text)
-            sentences = [str(s) for s in blob.sentences if 20 < len(str(s)) < 200]
-            
-            # Key concepts (noun phrases)
-            noun_phrases = [phrase.title() for phrase in blob.noun_phrases 
-                          if 3 < len(phrase) < 50 and not phrase.isdigit()]
-            key_concepts = [phrase for phrase, count in Counter(noun_phrases).most_common(15) if count > 1]
+            # Analyze sentence windows one at a time, as PDF pages are, so
+            # memory does not grow with the length of the text
+            notes = NotesAccumulator()
+            word_count = 0
+            for window in iter_text_windows(text, self.TEXT_WINDOW_CHARS):
+                notes.add_page(window)
+                word_count += len(window.split())
+            notes.finish()
+            key_concepts = notes.key_concepts()
             
             # Generate summary from first few sentences
-            summary_sentences = [str(s) for s in blob.sentences[:3]]
-            summary = ' '.join(summary_sentences)[:400]
+            summary = ' '.join(notes.summary_sentences)[:400]
             if len(summary) > 397:
                 summary += "..."
             
@@ -445,43 +1524,497 @@ class PDFProcessor:
             
             return {
                 'summary': summary,
-                'key_concepts': key_concepts[:10],
-                'key_points': sentences[:5],
-                'word_count': len(clean_text.split()),
-                'character_count': len(clean_text)
+                'key_concepts': key_concepts,
+                'key_points': notes.key_points,
+                'word_count': word_count,
+                'character_count': notes.total_characters
             }
             
         except Exception as e:
             return {"error": f"Failed to process text: {str(e)}"}
 
+    def process_text_cached(self, text, use_cache=True, name=None):
+        """process_text_directly behind the analysis cache, keyed by normalized text"""
+        normalized = re.sub(r'\s+', ' ', text).strip()
+        content_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        key = f"text:{content_hash}:v{self.ANALYZER_VERSION}"
+        cached = ai_config.analysis_cache.get(key) if use_cache else None
+        if cached is not None:
+            self.index_result('text', content_hash, name, cached)
+            return cached
+        
+        result = self.process_text_directly(text)
+        if 'error' not in result:
+            ai_config.analysis_cache.set(key, result, source_bytes=len(normalized.encode('utf-8')))
+        self.index_result('text', content_hash, name, result)
+        return result
+
+# ==================== BACKGROUND JOBS ====================
+class JobQueue:
+    """Bounded job queue for slow upload processing, with job state in SQLite
+    
+    Jobs run on a fixed pool of worker threads in the process that accepted
+    the upload, but their status and results live in a SQLite table, so a
+    poll answered by any gunicorn worker sees them. Submissions are refused
+    once max_pending jobs are queued or running in this process, and
+    finished jobs are forgotten after result_ttl seconds. Python threads
+    cannot be killed, so a job past its timeout is reported as failed and
+    its late result is discarded; so is a job still queued after timeout
+    seconds (its process went away).
+    """
+    COLUMNS = ('job_id', 'kind', 'content_hash', 'status', 'created_at', 'started_at', 'finished_at',
+               'result', 'error')
+    POLL_INTERVAL = 0.25  # Seconds between status reads when waiting on another process's job
+    
+    def __init__(self, workers, max_pending, timeout, result_ttl, db_path=':memory:'):
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self.db_path = db_path
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._events = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._connect()
+        
+        # Forked workers (e.g. gunicorn --preload) must not share a connection
+        os.register_at_fork(after_in_child=self._after_fork)
+    
+    def _connect(self):
+        # Every web worker reads and writes job rows; wait for the lock
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY, kind TEXT, content_hash TEXT, status TEXT,
+            created_at REAL, started_at REAL, finished_at REAL, result TEXT, error TEXT)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_by_content ON jobs (kind, content_hash)")
+        self._db.commit()
+    
+    def _after_fork(self):
+        # Jobs of the parent keep running there; this process starts empty
+        self._lock = threading.Lock()
+        self._events = {}
+        self._pending = 0
+        self._connect()
+    
+    def _row_to_job(self, row):
+        job = dict(zip(self.COLUMNS, row))
+        if job['result'] is None:
+            del job['result']
+        else:
+            job['result'] = json.loads(job['result'])
+        if job['error'] is None:
+            del job['error']
+        return job
+    
+    def is_full(self):
+        with self._lock:
+            return self._pending >= self.max_pending
+    
+    def submit(self, kind, func, file_path, content_hash=None):
+        """Queue func(file_path); returns the job id, or None when full"""
+        with self._lock:
+            self._expire_jobs()
+            if self._pending >= self.max_pending:
+                return None
+            job_id = uuid.uuid4().hex
+            self._pending += 1
+            self._db.execute("INSERT INTO jobs (job_id, kind, content_hash, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                             (job_id, kind, content_hash, 'queued', time.time()))
+            self._db.commit()
+            self._events[job_id] = threading.Event()
+        self._executor.submit(self._run, job_id, func, file_path)
+        return job_id
+    
+    def _run(self, job_id, func, file_path):
+        try:
+            with self._lock:
+                self._db.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE job_id = ? AND status = 'queued'",
+                                 (time.time(), job_id))
+                self._db.commit()
+            result = func(file_path)
+            if 'error' in result:
+                self._finish(job_id, status='failed', error=result['error'])
+            else:
+                self._finish(job_id, status='done', result=json.dumps(result))
+        except Exception as e:
+            self._finish(job_id, status='failed', error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                event = self._events.pop(job_id, None)
+            if event:
+                event.set()
+            try:
+                os.unlink(file_path)
+            except OSError:
+                pass
+    
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            # Expired or already timed out rows are left alone
+            self._db.execute("""UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?
+                                WHERE job_id = ? AND status != 'failed'""",
+                             (status, result, error, time.time(), job_id))
+            self._db.commit()
+    
+    def _expire_jobs(self):
+        """Time out overdue jobs and drop old finished ones (lock held)"""
+        now = time.time()
+        self._db.execute("""UPDATE jobs SET status = 'failed', error = 'Job timed out', finished_at = ?
+                            WHERE (status = 'running' AND started_at < ?) OR (status = 'queued' AND created_at < ?)""",
+                         (now, now - self.timeout, now - self.timeout))
+        self._db.execute("DELETE FROM jobs WHERE finished_at < ?", (now - self.result_ttl,))
+        self._db.commit()
+    
+    def find(self, kind, content_hash):
+        """Latest live job for the same upload content, if any"""
+        with self._lock:
+            self._expire_jobs()
+            row = self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE kind = ? AND content_hash = ? AND status != 'failed' "
+                "ORDER BY created_at DESC LIMIT 1", (kind, content_hash)).fetchone()
+        return self._row_to_job(row) if row else None
+    
+    def get(self, job_id):
+        with self._lock:
+            self._expire_jobs()
+            row = self._db.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?",
+                                   (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+    
+    def wait(self, job_id, timeout):
+        """Block until the job finishes or timeout passes
+        
+        Jobs running in this process signal an event; jobs of other
+        processes are polled.
+        """
+        event = self._events.get(job_id)
+        if event is not None:
+            return event.wait(timeout)
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in ('done', 'failed'):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(min(self.POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+    
+    def stats(self):
+        with self._lock:
+            tracked = self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            return {'pending': self._pending, 'max_pending': self.max_pending, 'tracked': tracked}
+
+def cleanup_stale_uploads(folder, max_age):
+    """Remove uploads left behind by jobs that never finished (e.g. a crash)"""
+    cutoff = time.time() - max_age
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except OSError:
+            pass
+
+# ==================== BATCH PROCESSING ====================
+DOCUMENT_EXTENSIONS = {'.pdf', '.txt', '.md'}
+
+def init_batch_worker():
+    # Each batch worker already handles a whole document; no nested page pools.
+    # Results are indexed by the parent, which knows the document names.
+    ai_config.pdf_workers = 1
+    pdf_processor.search_index = None
+
+def analyze_document(path, content_hash=None, summarize=False, use_cache=True):
+    """Notes for one PDF or text file, plus a TextSummarizer summary if asked; runs in a batch worker"""
+    if path.lower().endswith('.pdf'):
+        result = pdf_processor.extract_notes_cached(path, content_hash=content_hash, use_cache=use_cache)
+        text = pdf_processor.extract_text_from_pdf(path) if summarize and 'error' not in result else None
+    else:
+        with open(path, encoding='utf-8', errors='replace') as file:
+            text = file.read()
+        result = pdf_processor.process_text_cached(text, use_cache=use_cache)
+    if summarize and text and 'error' not in result:
+        result = dict(result, text_summary=text_summarizer.summarize_text(text))
+    return result
+
+class BatchProcessor:
+    """Runs analyze_document over many documents on one shared process pool
+    
+    The pool is started with spawn rather than fork: workers run the full
+    analysis, including Gemini calls on thread pools, which a forked copy
+    of a threaded server cannot use safely. Workers load TextBlob and NLTK
+    once and keep them for every later document and batch. Each run()
+    keeps at most two documents per worker submitted, so a large folder
+    streams results steadily and concurrent batches share the pool.
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+    
+    def get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=init_batch_worker)
+            return self._pool
+    
+    def _reset_pool(self, pool):
+        """Drop a pool whose worker died so the next document starts a fresh one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+    
+    def run(self, documents, completed=(), summarize=False, use_cache=True):
+        """Yield an event per (name, path, content_hash) document as it finishes, then a summary
+        
+        Documents whose content hash is in completed (a manifest of earlier
+        runs) are reported as skipped without being processed again.
+        """
+        started = time.perf_counter()
+        counts = Counter()
+        pending = {}
+        documents = iter(documents)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < self.workers * 2:
+                    document = next(documents, None)
+                    if document is None:
+                        exhausted = True
+                        break
+                    name, path, content_hash = document
+                    if content_hash in completed:
+                        counts['skipped'] += 1
+                        metrics.inc('batch_documents_total', status='skipped')
+                        yield {'event': 'document', 'name': name, 'content_hash': content_hash, 'status': 'skipped'}
+                        continue
+                    pool = self.get_pool()
+                    future = pool.submit(analyze_document, path, content_hash, summarize, use_cache)
+                    pending[future] = (name, content_hash, pool, time.perf_counter())
+                if not pending:
+                    break
+                
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, content_hash, pool, submitted = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        self._reset_pool(pool)
+                        result = {'error': f"Batch worker crashed: {e}"}
+                    except Exception as e:
+                        result = {'error': str(e)}
+                    
+                    event = {'event': 'document', 'name': name, 'content_hash': content_hash,
+                             'seconds': round(time.perf_counter() - submitted, 3)}
+                    if 'error' in result:
+                        event.update(status='failed', error=result['error'])
+                    else:
+                        event.update(status='done', result=result)
+                        pdf_processor.index_result('pdf' if name.lower().endswith('.pdf') else 'text',
+                                                   content_hash, name, result)
+                    counts[event['status']] += 1
+                    metrics.inc('batch_documents_total', status=event['status'])
+                    yield event
+        finally:
+            # Consumer went away: drop documents that have not started yet
+            for future in pending:
+                future.cancel()
+        
+        yield {
+            'event': 'summary',
+            'documents': sum(counts.values()),
+            'done': counts['done'],
+            'failed': counts['failed'],
+            'skipped': counts['skipped'],
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+
+def copy_limited(source, path, max_bytes):
+    """Copy a stream to path, hashing as it goes; ValueError past max_bytes"""
+    digest = hashlib.sha256()
+    written = 0
+    with open(path, 'wb') as target:
+        for block in iter(lambda: source.read(1024 * 1024), b''):
+            written += len(block)
+            if written > max_bytes:
+                raise ValueError("Archive expands beyond the batch size limit")
+            digest.update(block)
+            target.write(block)
+    return written, digest.hexdigest()
+
+def extract_archive(archive_path, folder, max_files, max_bytes):
+    """Unpack the supported documents of a zip into folder
+    
+    Returns [(name, path, content_hash)] and the bytes written. Sizes are
+    counted while decompressing rather than trusted from the archive
+    headers, so a zip bomb stops at max_bytes.
+    """
+    documents, extracted = [], 0
+    with zipfile.ZipFile(archive_path) as archive:
+        members = [info for info in archive.infolist() if not info.is_dir()
+                   and os.path.splitext(info.filename)[1].lower() in DOCUMENT_EXTENSIONS]
+        if len(members) > max_files:
+            raise ValueError(f"Archive holds more than {max_files} documents")
+        for index, info in enumerate(members):
+            path = os.path.join(folder, f"{index}_{secure_filename(os.path.basename(info.filename)) or 'document'}")
+            with archive.open(info) as source:
+                size, content_hash = copy_limited(source, path, max_bytes - extracted)
+            extracted += size
+            documents.append((info.filename, path, content_hash))
+    return documents, extracted
+
 # Initialize feature classes
+hedger = Hedger(workers=ai_config.hedge_workers)
 mental_health_bot = MentalHealthBot()
 text_summarizer = TextSummarizer()
-pdf_processor = PDFProcessor()
+search_index = SearchIndex(ai_config.search_index_db)
+pdf_processor = PDFProcessor(search_index=search_index)
+job_queue = JobQueue(
+    workers=ai_config.job_workers,
+    max_pending=ai_config.job_max_pending,
+    timeout=ai_config.job_timeout,
+    result_ttl=ai_config.job_result_ttl,
+    db_path=ai_config.job_store_db
+)
+batch_processor = BatchProcessor(workers=ai_config.batch_workers)
+
+def collect_component_metrics():
+    """Values the Gemini client, caches, job queue and chat store already track"""
+    gemini = ai_config.gemini_client.stats()
+    by_feature = gemini['by_feature'].items()
+    histograms = gemini['histograms']
+    response_cache = ai_config.response_cache.stats()['features'].items()
+    analysis_cache = ai_config.analysis_cache.stats()
+    jobs = job_queue.stats()
+    return [
+        ('gemini_requests_total', 'counter', 'Gemini API attempts per feature, retries included',
+         [({'feature': feature}, counts.get('calls', 0)) for feature, counts in by_feature]),
+        ('gemini_errors_total', 'counter', 'Gemini calls that failed after retries, per feature',
+         [({'feature': feature}, counts.get('errors', 0)) for feature, counts in by_feature]),
+        ('gemini_retries_total', 'counter', 'Gemini retries per feature',
+         [({'feature': feature}, counts.get('retries', 0)) for feature, counts in by_feature]),
+        ('gemini_rejected_total', 'counter', 'Gemini calls refused by the open circuit breaker, per feature',
+         [({'feature': feature}, counts.get('rejected', 0)) for feature, counts in by_feature]),
+        ('gemini_circuit_open', 'gauge', '1 while the Gemini circuit breaker is open',
+         [({}, int(gemini['circuit'] == 'open'))]),
+        ('gemini_latency_seconds', 'histogram', 'Gemini latency per attempt, per feature',
+         [({'feature': feature}, snapshot) for feature, snapshot in histograms.get('upstream_latency', {}).items()]),
+        ('gemini_queue_seconds', 'histogram', 'Wait for a free Gemini request slot, per feature',
+         [({'feature': feature}, snapshot) for feature, snapshot in histograms.get('queue_time', {}).items()]),
+        ('gemini_first_token_seconds', 'histogram', 'Time to the first streamed Gemini chunk, per feature',
+         [({'feature': feature}, snapshot) for feature, snapshot in histograms.get('first_token_latency', {}).items()]),
+        ('gemini_input_tokens', 'histogram', 'Input tokens per Gemini request, system instruction included, per feature',
+         [({'feature': feature}, snapshot) for feature, snapshot in histograms.get('input_tokens', {}).items()]),
+        ('gemini_output_tokens', 'histogram', 'Output tokens per Gemini request, per feature',
+         [({'feature': feature}, snapshot) for feature, snapshot in histograms.get('output_tokens', {}).items()]),
+        ('response_cache_hits_total', 'counter', 'Gemini response cache hits per feature',
+         [({'feature': feature}, counts['hits']) for feature, counts in response_cache]),
+        ('response_cache_misses_total', 'counter', 'Gemini response cache misses per feature',
+         [({'feature': feature}, counts['misses']) for feature, counts in response_cache]),
+        ('analysis_cache_hits_total', 'counter', 'Document analysis cache hits', [({}, analysis_cache['hits'])]),
+        ('analysis_cache_misses_total', 'counter', 'Document analysis cache misses', [({}, analysis_cache['misses'])]),
+        ('analysis_cache_bytes', 'gauge', 'Size of stored analysis results', [({}, analysis_cache['size_bytes'])]),
+        ('jobs_pending', 'gauge', 'Background jobs queued or running', [({}, jobs['pending'])]),
+        ('search_documents', 'gauge', 'Documents in the search index', [({}, search_index.stats()['documents'])]),
+        ('chat_sessions', 'gauge', 'Chat sessions held in memory',
+         [({}, mental_health_bot.conversations.stats()['sessions'])]),
+    ]
+
+metrics.add_collector(collect_component_metrics)
+metrics.describe('hedge_requests_total', 'counter',
+                 'Hedged requests by outcome: remote (Gemini within the SLO), slo_missed, remote_failed, saturated')
+metrics.describe('hedge_late_results_total', 'counter',
+                 'Gemini results that arrived after the SLO and were only cached, per feature')
+metrics.describe('prompt_trimmed_total', 'counter', 'User text trimmed to fit the input token budget, per feature')
+metrics.describe('batch_documents_total', 'counter', 'Batch documents by outcome (done, failed, skipped)')
+metrics.describe('sentiment_prefilter_hits_total', 'counter',
+                 'Gemini sentiment calls skipped because the local model was confident')
 
 # ==================== ROUTES ====================
 
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/static/<path:filename>')
+@bp.route('/static/<path:filename>')
 def static_files(filename):
     return send_from_directory('static', filename)
 
-@app.route('/api/chat', methods=['POST'])
+def wants_async():
+    return request.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+def wants_cache():
+    """Clients can bypass cached analysis results with ?cache=0"""
+    return request.args.get('cache', '').lower() not in ('0', 'false', 'no')
+
+def enqueue_upload(kind, file, func):
+    """Queue processing of an upload, reusing a job for identical content"""
+    upload = file.stream
+    existing = job_queue.find(kind, upload.sha256)
+    if existing:
+        return jsonify({
+            'job_id': existing['job_id'],
+            'status': existing['status'],
+            'status_url': f"/api/jobs/{existing['job_id']}",
+            'deduplicated': True
+        }), 202
+    
+    if job_queue.is_full():
+        return jsonify({'error': 'Server is busy, please retry shortly'}), 429
+    
+    file_path = upload.claim()
+    job_id = job_queue.submit(kind, func, file_path, content_hash=upload.sha256)
+    if job_id is None:
+        os.unlink(file_path)
+        return jsonify({'error': 'Server is busy, please retry shortly'}), 429
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/api/jobs/{job_id}'
+    }), 202
+
+@bp.route('/api/chat', methods=['POST'])
 def chat():
     try:
         data = request.get_json()
         message = data.get('message', '')
         if not message:
             return jsonify({'error': 'Message is required'}), 400
-        result = mental_health_bot.process_message(message)
+        session_id = data.get('session_id')
+        if session_id is not None and not isinstance(session_id, str):
+            return jsonify({'error': 'session_id must be a string'}), 400
+        result = mental_health_bot.process_message(message, session_id,
+                                                   slo=ai_config.hedge_slo_ms['chat'] / 1000)
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/summarize', methods=['POST'])
+@bp.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream the reply as Server-Sent Events: token events, then sentiment"""
+    data = request.get_json(silent=True) or {}
+    message = data.get('message', '')
+    if not message:
+        return jsonify({'error': 'Message is required'}), 400
+    session_id = data.get('session_id')
+    if session_id is not None and not isinstance(session_id, str):
+        return jsonify({'error': 'session_id must be a string'}), 400
+    
+    def generate():
+        for event, payload in mental_health_bot.stream_message(message, session_id):
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    # Tell proxies not to buffer, or tokens arrive all at once
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+@bp.route('/api/summarize', methods=['POST'])
 def summarize():
     """Handle text summarization"""
     try:
@@ -491,13 +2024,13 @@ def summarize():
         if not text:
             return jsonify({'error': 'Text is required'}), 400
         
-        result = text_summarizer.summarize_text(text)
+        result = text_summarizer.summarize_text(text, slo=ai_config.hedge_slo_ms['summarize'] / 1000)
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/process-video', methods=['POST'])
+@bp.route('/api/process-video', methods=['POST'])
 def process_video():
     """Handle video/audio file processing"""
     try:
@@ -514,10 +2047,12 @@ def process_video():
         if file_ext not in allowed_extensions:
             return jsonify({'error': 'Unsupported file format'}), 400
         
-        # Save the file
-        filename = file.filename
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        if wants_async():
+            return enqueue_upload('video', file, text_summarizer.process_audio_video)
+        
+        # The body was already streamed to disk; the file is removed after the request
+        file_path = file.stream.path
+        file.stream.flush()
         
         try:
             # Process audio/video with basic transcription
@@ -525,95 +2060,262 @@ def process_video():
             return jsonify(result)
         except Exception as e:
             return jsonify({'error': f'Processing failed: {str(e)}'}), 500
-        finally:
-            # Clean up the uploaded file
-            try:
-                if os.path.exists(file_path):
-                    os.unlink(file_path)
-            except:
-                pass
                 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/process-pdf', methods=['POST'])
+@bp.route('/api/process-pdf', methods=['POST'])
 def process_pdf():
     try:
-        print("DEBUG: PDF processing started")
         if 'pdf_file' not in request.files:
-            print("DEBUG: No pdf_file in request")
+            log.debug('pdf_rejected', reason='no_file')
             return jsonify({'error': 'No file provided'}), 400
         
         file = request.files['pdf_file']
-        print(f"DEBUG: File received: {file.filename}")
         
         if file.filename == '' or not file.filename.lower().endswith('.pdf'):
-            print("DEBUG: Invalid file or not PDF")
+            log.debug('pdf_rejected', reason='not_pdf', filename=file.filename)
             return jsonify({'error': 'Please upload a valid PDF file'}), 400
         
-        filename = file.filename
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        print(f"DEBUG: Saving to: {file_path}")
+        if wants_async():
+            content_hash, use_cache = file.stream.sha256, wants_cache()
+            name = file.filename
+            return enqueue_upload('pdf', file, lambda path: pdf_processor.extract_notes_cached(
+                path, content_hash=content_hash, use_cache=use_cache, name=name))
         
-        file.save(file_path)
-        print("DEBUG: File saved, processing...")
+        # The body was already streamed to disk; the file is removed after the request
+        file_path = file.stream.path
+        file.stream.flush()
+        log.debug('pdf_received', filename=file.filename, size=file.stream.size)
         
-        result = pdf_processor.extract_notes(file_path)
-        print(f"DEBUG: Processing result: {type(result)}")
-        
-        # Clean up
-        try:
-            os.unlink(file_path)
-            print("DEBUG: Cleanup completed")
-        except Exception as cleanup_error:
-            print(f"DEBUG: Cleanup error: {cleanup_error}")
-            pass
+        result = pdf_processor.extract_notes_cached(file_path, content_hash=file.stream.sha256,
+                                                    use_cache=wants_cache(), name=file.filename)
+        log.debug('pdf_processed', filename=file.filename, error=result.get('error'))
             
         return jsonify(result)
     except Exception as e:
-        print(f"DEBUG: Exception in process_pdf: {str(e)}")
+        log.error('pdf_failed', exc_info=True, error=str(e))
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/process-text', methods=['POST'])
+@bp.route('/api/process-pdf/stream', methods=['POST'])
+def process_pdf_stream():
+    """Stream PDF progress and partial key concepts as NDJSON"""
+    try:
+        if 'pdf_file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['pdf_file']
+        if file.filename == '' or not file.filename.lower().endswith('.pdf'):
+            return jsonify({'error': 'Please upload a valid PDF file'}), 400
+        
+        # The stream outlives the view, so it takes over deleting the file
+        content_hash, use_cache, name = file.stream.sha256, wants_cache(), file.filename
+        file_path = file.stream.claim()
+        
+        def generate():
+            try:
+                for event in pdf_processor.stream_notes(file_path, content_hash, use_cache, name):
+                    yield json.dumps(event) + '\n'
+            finally:
+                # Clean up once the stream is finished or abandoned
+                try:
+                    os.unlink(file_path)
+                except OSError:
+                    pass
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/process-text', methods=['POST'])
 def process_text():
     try:
-        print("DEBUG: Text processing started")
         data = request.get_json()
         
         if not data or 'text' not in data:
-            print("DEBUG: No text in request")
+            log.debug('text_rejected', reason='no_text')
             return jsonify({'error': 'No text provided'}), 400
         
         text = data['text'].strip()
-        print(f"DEBUG: Text received, length: {len(text)}")
         
         if len(text) < 50:
-            print("DEBUG: Text too short")
+            log.debug('text_rejected', reason='too_short', length=len(text))
             return jsonify({'error': 'Text too short for meaningful analysis'}), 400
         
         # Use the same text processing logic as PDF processor but directly on text
-        result = pdf_processor.process_text_directly(text)
-        print(f"DEBUG: Processing result: {type(result)}")
+        result = pdf_processor.process_text_cached(text, use_cache=wants_cache(), name=data.get('title'))
+        log.debug('text_processed', length=len(text), error=result.get('error'))
         
         return jsonify(result)
     except Exception as e:
-        print(f"DEBUG: Error in text processing: {e}")
+        log.error('text_failed', exc_info=True, error=str(e))
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/health')
+@bp.route('/api/process-batch', methods=['POST'])
+def process_batch():
+    """Analyze many documents (PDF, .txt, .md or zips of them), streaming NDJSON per document"""
+    files = [file for file in request.files.getlist('files') if file.filename]
+    if not files:
+        return jsonify({'error': 'No files provided'}), 400
+    
+    # Hashes of documents finished in an earlier, interrupted batch
+    completed = set(re.findall(r'\b[0-9a-f]{64}\b', request.form.get('completed', '')))
+    summarize = request.args.get('summarize', '').lower() in ('1', 'true', 'yes')
+    use_cache = wants_cache()
+    
+    # Everything the batch reads lives in one folder, removed when the stream ends
+    folder = tempfile.mkdtemp(prefix='batch_', dir=current_app.config['UPLOAD_FOLDER'])
+    documents, ignored = [], []
+    extract_budget = ai_config.batch_max_extracted_mb * 1024 * 1024  # Shared by every archive in the batch
+    try:
+        for file in files:
+            extension = os.path.splitext(file.filename)[1].lower()
+            if extension == '.zip':
+                file.stream.flush()
+                extracted_documents, extracted = extract_archive(file.stream.path, folder,
+                                                                 ai_config.batch_max_files - len(documents),
+                                                                 extract_budget)
+                documents += extracted_documents
+                extract_budget -= extracted
+            elif extension in DOCUMENT_EXTENSIONS:
+                path = os.path.join(folder, f"{len(documents)}_{os.path.basename(file.stream.path)}")
+                content_hash = file.stream.sha256
+                os.replace(file.stream.claim(), path)
+                documents.append((file.filename, path, content_hash))
+            else:
+                ignored.append(file.filename)
+        if len(documents) > ai_config.batch_max_files:
+            raise ValueError(f"A batch may hold at most {ai_config.batch_max_files} documents")
+    except (zipfile.BadZipFile, ValueError) as e:
+        shutil.rmtree(folder, ignore_errors=True)
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        try:
+            for name in ignored:
+                yield json.dumps({'event': 'ignored', 'name': name, 'error': 'Unsupported file type'}) + '\n'
+            for event in batch_processor.run(documents, completed, summarize, use_cache):
+                yield json.dumps(event) + '\n'
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@bp.route('/api/search')
+def search():
+    """BM25-ranked search over every processed document's notes"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    started = time.perf_counter()
+    results, truncated = search_index.search(query, limit)
+    return jsonify({
+        'query': query,
+        'results': results,
+        'truncated': truncated,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+@bp.route('/api/search/related')
+def related_concepts():
+    """Key concepts that co-occur with a concept across processed documents"""
+    concept = request.args.get('concept', '').strip()
+    if not concept:
+        return jsonify({'error': 'Query parameter concept is required'}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    return jsonify(search_index.related_concepts(concept, limit))
+
+@bp.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Poll a background job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
+@bp.route('/api/jobs/<job_id>/stream')
+def job_stream(job_id):
+    """Stream job status as Server-Sent Events until it finishes"""
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    def generate():
+        while True:
+            finished = job_queue.wait(job_id, timeout=5)
+            job = job_queue.get(job_id)
+            if job is None:
+                return
+            yield f"event: status\ndata: {json.dumps(job)}\n\n"
+            if finished or job['status'] in ('done', 'failed'):
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+@bp.route('/api/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of this worker process's metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/api/health')
 def health_check():
     return jsonify({
         'status': 'healthy',
         'app_name': 'StudyByte',
         'features': ['Mental Health Chat', 'Text Summarizer', 'PDF Processor'],
-        'gemini_available': ai_config.is_gemini_available()
+        'gemini_available': ai_config.is_gemini_available(),
+        'cache': ai_config.response_cache.stats(),
+        'gemini': ai_config.gemini_client.stats(),
+        'sentiment_batching': mental_health_bot.sentiment_batcher.stats(),
+        'conversations': mental_health_bot.conversations.stats(),
+        'jobs': job_queue.stats(),
+        'analysis_cache': ai_config.analysis_cache.stats(),
+        'search_index': search_index.stats()
     })
 
+# ==================== APP FACTORY ====================
+def warm_up():
+    """Load heavy libraries and NLTK models now rather than on the first request
+    
+    Call before forking workers so they share the loaded pages.
+    """
+    load_pypdf2()
+    try:
+        # The sentence splitter and noun phrase chunker the notes pipeline uses
+        notes = NotesAccumulator()
+        notes.add_page("Students review lecture notes before exams. Good notes help students.")
+        notes.finish()
+        mental_health_bot.analyze_sentiment_textblob("warm up")
+    except Exception as e:
+        log.warning('nltk_data_unavailable', error=str(e), fix='python -m textblob.download_corpora')
+    mental_health_bot.analyze_sentiment_local("warm up")
+    if ai_config.is_gemini_available():
+        ai_config.gemini_model
+
+def create_app(warm=None):
+    """Build the Flask app; set warm (or WARM_UP=1) to preload heavy libraries"""
+    app = Flask(__name__)
+    CORS(app)
+    app.request_class = UploadRequest
+    
+    if not os.path.exists(UPLOAD_FOLDER):
+        os.makedirs(UPLOAD_FOLDER)
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+    cleanup_stale_uploads(UPLOAD_FOLDER, ai_config.job_timeout * 2)
+    
+    app.register_blueprint(bp)
+    
+    if ai_config.warm_up if warm is None else warm:
+        warm_up()
+    return app
+
 if __name__ == '__main__':
     print("🚀 Starting StudyByte...")
     print("📊 Features: Mental Health Chat | Text Summarizer | PDF Processor")
     print("🌐 Access: http://127.0.0.1:5000")
     
+    app = create_app()
     app.run(
         debug=True,
         host='0.0.0.0',
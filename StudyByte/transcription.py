@@ -0,0 +1,121 @@
+"""
+Local Speech-to-Text for Student Companion
+Extracts audio with ffmpeg, splits it into windows at silence boundaries and
+transcribes the windows with Whisper on a CPU process pool
+"""
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper expects 16 kHz mono
+FRAME_SECONDS = 0.1  # Energy resolution when looking for silence
+SILENCE_SEARCH_SECONDS = 5  # How far before a window boundary to look for silence
+
+# Loaded once per worker process by _init_worker
+_worker_model = None
+
+def probe_duration(media_path):
+    """Real duration in seconds from the container metadata"""
+    import ffmpeg
+    info = ffmpeg.probe(media_path)
+    return float(info['format']['duration'])
+
+def load_audio(media_path):
+    """Decode the audio track to 16 kHz mono float32 samples"""
+    import ffmpeg
+    output, _ = (
+        ffmpeg.input(media_path)
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=SAMPLE_RATE)
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(output, np.int16).astype(np.float32) / 32768.0
+
+def split_at_silence(samples, window_seconds):
+    """Split samples into windows of at most window_seconds
+
+    Each window ends at the quietest frame in the last few seconds before
+    its limit, so words are rarely cut in half.
+    """
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    window = int(window_seconds * SAMPLE_RATE)
+    search = int(min(SILENCE_SEARCH_SECONDS, window_seconds / 2) * SAMPLE_RATE)
+
+    # RMS energy per frame, computed once for the whole signal
+    frame_count = len(samples) // frame
+    energy = np.sqrt(np.mean(samples[:frame_count * frame].reshape(-1, frame) ** 2, axis=1))
+
+    windows = []
+    start = 0
+    while len(samples) - start > window:
+        first_frame = (start + window - search) // frame
+        last_frame = (start + window) // frame
+        end = (first_frame + int(np.argmin(energy[first_frame:last_frame]))) * frame
+        if end <= start:
+            end = start + window
+        windows.append((start, end))
+        start = end
+    windows.append((start, len(samples)))
+    return windows
+
+def _init_worker(model_name, threads):
+    """Load the Whisper model once per worker process"""
+    global _worker_model
+    import torch
+    import whisper
+    torch.set_num_threads(threads)
+    _worker_model = whisper.load_model(model_name, device='cpu')
+
+def transcribe_window(samples):
+    result = _worker_model.transcribe(samples, fp16=False)
+    return result['text'].strip()
+
+class Transcriber:
+    """Chunked, parallel CPU transcription with a lazily started worker pool
+    
+    Workers are spawned rather than forked from the threaded server, and
+    a pool whose worker died (e.g. OOM in Whisper) is replaced on next use.
+    """
+    def __init__(self, model_name='base', workers=1, window_seconds=30, threads_per_worker=1):
+        self.model_name = model_name
+        self.workers = workers
+        self.window_seconds = window_seconds
+        self.threads_per_worker = threads_per_worker
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.threads_per_worker)
+                )
+            return self._pool
+
+    def _reset_pool(self, pool):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+
+    def transcribe(self, media_path):
+        """Transcript text plus real duration and window count"""
+        duration = probe_duration(media_path)
+        samples = load_audio(media_path)
+        windows = split_at_silence(samples, self.window_seconds)
+
+        pool = self.get_pool()
+        try:
+            texts = list(pool.map(transcribe_window, [samples[start:end] for start, end in windows]))
+        except BrokenProcessPool:
+            self._reset_pool(pool)
+            raise
+        return {
+            'text': ' '.join(text for text in texts if text),
+            'duration_seconds': duration,
+            'windows': len(windows)
+        }
@@ -0,0 +1,7 @@
+"""
+WSGI entry point for StudyByte
+Run in production with: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from student_companion_clean import create_app
+
+app = create_app()